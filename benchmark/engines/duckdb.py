@@ -1,9 +1,24 @@
 """DuckDB database engine for the benchmark."""
 
+import re
 import time
 
 import duckdb
 
+from benchmark.engines.statements import iter_statements, may_return_rows
+
+# Monotonic, nanosecond-resolution clock for all timings
+_now = time.perf_counter_ns
+
+# Rows fetched per call when only counting the remainder of a result
+_COUNT_CHUNK_ROWS = 65536
+
+# Start of each table's block in a pre-agg script: DROP TABLE IF EXISTS <name> [CASCADE];
+_DROP_RE = re.compile(
+    r"^\s*DROP\s+TABLE\s+IF\s+EXISTS\s+([A-Za-z_][A-Za-z0-9_]*)(?:\s+CASCADE)?\s*;?\s*$",
+    re.M | re.I,
+)
+
 
 class DuckDBEngine:
     """Manages DuckDB connections and query execution."""
@@ -20,93 +35,134 @@ class DuckDBEngine:
         if self.conn:
             self.conn.close()
 
+    def clone(self) -> "DuckDBEngine":
+        """Return a new engine with its own connection to the same database."""
+        other = DuckDBEngine(self.config)
+        other.conn = self.conn.cursor()
+        return other
+
     def execute_sql_file(self, filepath: str) -> float:
-        """Execute a SQL file and return wall-clock time in seconds."""
-        with open(filepath, "r") as f:
-            sql = f.read()
-        return self.execute(sql)
+        """Execute a SQL file and return wall-clock time in seconds.
+
+        The file is streamed one statement at a time rather than read whole.
+        """
+        return sum(self.execute(stmt) for stmt in iter_statements(filepath))
 
     def execute(self, sql: str) -> float:
         """Execute SQL (potentially multiple statements) and return wall-clock time."""
-        start = time.time()
-        statements = [s.strip() for s in sql.split(";") if s.strip()]
-        for stmt in statements:
-            self.conn.execute(stmt)
-        elapsed = time.time() - start
+        start = _now()
+        self.conn.execute(sql)
+        elapsed = (_now() - start) * 1e-9
         return elapsed
 
-    def execute_query(self, sql: str) -> dict:
-        """Execute a query and return timing + results."""
-        start = time.time()
-        statements = [s.strip() for s in sql.split(";") if s.strip()]
+    def execute_query(self, sql: str, preview_rows: int = None) -> dict:
+        """Execute a query and return timing + results.
+
+        DuckDB runs a multi-statement batch in one call and returns the result
+        of its final statement, so rows come from the last statement. With
+        ``preview_rows``, only that many rows are converted to dicts; the rest
+        are counted in chunks for ``row_count`` and discarded.
+        """
+        start = _now()
         rows = []
-        for stmt in statements:
-            result = self.conn.execute(stmt)
-            if result.description:
-                columns = [desc[0] for desc in result.description]
+        row_count = 0
+        result = self.conn.execute(sql)
+        # Skip result inspection for SQL that cannot produce rows
+        if may_return_rows(sql) and result is not None and result.description:
+            columns = [desc[0] for desc in result.description]
+            if preview_rows is None:
                 rows = [dict(zip(columns, row)) for row in result.fetchall()]
-        elapsed = time.time() - start
+                row_count = len(rows)
+            else:
+                rows = [dict(zip(columns, row)) for row in result.fetchmany(preview_rows)]
+                row_count = len(rows)
+                while chunk := result.fetchmany(_COUNT_CHUNK_ROWS):
+                    row_count += len(chunk)
+        elapsed = (_now() - start) * 1e-9
         return {
             "walltime_seconds": elapsed,
             "rows": rows,
-            "row_count": len(rows),
+            "row_count": row_count,
         }
 
     def execute_preagg_pipeline(self, sql_file: str) -> dict:
         """Execute the pre-aggregation pipeline and return per-table timings."""
-        with open(sql_file, "r") as f:
-            full_sql = f.read()
-
-        # Split by DROP/CREATE TABLE statements to time each table separately
+        # Each table's block runs from its DROP TABLE up to the next one, so
+        # any CREATE INDEX statements are timed with the table they belong to.
+        # Only one table's statements are held in memory at a time; they are
+        # re-joined with the separator on its own line so a trailing "--"
+        # comment cannot swallow it.
         timings = {}
-        current_table = None
-        current_sql = []
-
-        for line in full_sql.split("\n"):
-            if line.strip().upper().startswith("DROP TABLE IF EXISTS"):
-                # Save previous table's SQL
-                if current_table and current_sql:
-                    sql = "\n".join(current_sql)
-                    start = time.time()
-                    for stmt in sql.split(";"):
-                        stmt = stmt.strip()
-                        if stmt:
-                            self.conn.execute(stmt)
-                    timings[current_table] = time.time() - start
-
-                # Extract table name (DROP TABLE IF EXISTS <name> [CASCADE];)
-                parts = line.strip().split()
-                table_name = parts[4] if len(parts) > 4 else "unknown"
-                current_table = table_name.rstrip(";").replace("CASCADE", "").strip()
-                current_sql = [line]
-            elif line.strip().upper().startswith("CREATE INDEX"):
-                current_sql.append(line)
-            else:
-                if current_table:
-                    current_sql.append(line)
-
-        # Don't forget the last table
-        if current_table and current_sql:
-            sql = "\n".join(current_sql)
-            start = time.time()
-            for stmt in sql.split(";"):
-                stmt = stmt.strip()
-                if stmt:
-                    self.conn.execute(stmt)
-            timings[current_table] = time.time() - start
+        table_name = None
+        block = []
+        for stmt in iter_statements(sql_file):
+            match = _DROP_RE.search(stmt)
+            if match:
+                if table_name:
+                    timings[table_name] = self.execute("\n;\n".join(block))
+                table_name, block = match.group(1), []
+            if table_name:
+                block.append(stmt)
+        if table_name:
+            timings[table_name] = self.execute("\n;\n".join(block))
 
         return timings
 
+    def execute_blocks(self, blocks):
+        """Execute ``(name, sql)`` blocks in order, yielding ``(name, seconds, error)``.
+
+        Each block is a single multi-statement call. A failing block yields
+        its exception with a time of -1 and the remaining blocks still run.
+        """
+        for name, sql in blocks:
+            start = _now()
+            try:
+                self.conn.execute(sql)
+            except Exception as e:
+                yield name, -1, e
+                continue
+            yield name, (_now() - start) * 1e-9, None
+
     def table_row_count(self, table_name: str) -> int:
         """Get row count for a table."""
         result = self.conn.execute(f"SELECT COUNT(*) FROM {table_name}")
         return result.fetchone()[0]
 
-    def load_csv(self, table_name: str, csv_path: str) -> float:
-        """Load a CSV file into an existing table. Returns wall-clock time."""
-        start = time.time()
+    def load_csv(
+        self, table_name: str, csv_path: str, parallel: bool = True, sample_size: int = -1
+    ) -> float:
+        """Load a CSV file into an existing table. Returns wall-clock time.
+
+        ``parallel`` enables DuckDB's multi-threaded CSV reader; ``sample_size``
+        is the number of rows sampled for sniffing (-1 scans the whole file).
+        """
+        start = _now()
         self.conn.execute(
-            f"COPY {table_name} FROM '{csv_path}' (HEADER, DELIMITER ',', NULL '')"
+            f"COPY {table_name} FROM '{csv_path}' (HEADER, DELIMITER ',', NULL '', "
+            f"PARALLEL {str(parallel).lower()}, SAMPLE_SIZE {sample_size})"
         )
-        elapsed = time.time() - start
+        elapsed = (_now() - start) * 1e-9
+        return elapsed
+
+    def load_parquet(self, table_name: str, parquet_path: str) -> float:
+        """Load a Parquet file into an existing table. Returns wall-clock time."""
+        start = _now()
+        self.conn.execute(
+            f"INSERT INTO {table_name} SELECT * FROM read_parquet('{parquet_path}')"
+        )
+        elapsed = (_now() - start) * 1e-9
+        return elapsed
+
+    def load_arrow(self, table_name: str, arrow_table) -> float:
+        """Load an in-memory Arrow table (or DataFrame) into an existing table.
+
+        Returns wall-clock time.
+        """
+        start = _now()
+        self.conn.register("_arrow_load", arrow_table)
+        try:
+            self.conn.execute(f"INSERT INTO {table_name} SELECT * FROM _arrow_load")
+        finally:
+            self.conn.unregister("_arrow_load")
+        elapsed = (_now() - start) * 1e-9
         return elapsed
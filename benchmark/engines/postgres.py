@@ -1,107 +1,190 @@
 """Postgres database engine for the benchmark."""
 
+import re
 import time
-import psycopg2
-import psycopg2.extras
+
+try:
+    import psycopg2
+    import psycopg2.extras
+except ImportError:  # psycopg (v3) can be used instead, see use_psycopg3
+    psycopg2 = None
+
+from benchmark.engines.statements import iter_statements, may_return_rows
+
+# Monotonic, nanosecond-resolution clock for all timings
+_now = time.perf_counter_ns
+
+# Start of each table's block in a pre-agg script: DROP TABLE IF EXISTS <name> [CASCADE];
+_DROP_RE = re.compile(
+    r"^\s*DROP\s+TABLE\s+IF\s+EXISTS\s+([A-Za-z_][A-Za-z0-9_]*)(?:\s+CASCADE)?\s*;?\s*$",
+    re.M | re.I,
+)
 
 
 class PostgresEngine:
     """Manages Postgres connections and query execution."""
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, use_psycopg3: bool = False):
         self.config = config
         self.conn = None
+        # psycopg 3 fetches single-statement results over the binary protocol,
+        # decoding numerics in C rather than parsing text in Python
+        self.use_psycopg3 = use_psycopg3
+        # Tables with a server-side prepared COUNT(*) statement (cnt_<table>)
+        self._prepared_counts = set()
 
     def connect(self):
-        self.conn = psycopg2.connect(
+        self._prepared_counts = set()  # prepared statements are per-session
+        params = dict(
             host=self.config.get("host", "localhost"),
             port=self.config.get("port", 5432),
             dbname=self.config["database"],
             user=self.config.get("user", "postgres"),
             password=self.config.get("password", ""),
         )
-        self.conn.autocommit = True
+        if self.use_psycopg3:
+            import psycopg
+
+            self.conn = psycopg.connect(**params, autocommit=True)
+        else:
+            if psycopg2 is None:
+                raise ImportError(
+                    "psycopg2 is not installed: pip install -e .[postgres], "
+                    "or set postgres.use_psycopg3: true to use psycopg 3"
+                )
+            self.conn = psycopg2.connect(**params)
+            self.conn.autocommit = True
 
     def close(self):
         if self.conn:
             self.conn.close()
 
+    def clone(self) -> "PostgresEngine":
+        """Return a new, connected engine with its own server session."""
+        other = PostgresEngine(self.config, use_psycopg3=self.use_psycopg3)
+        other.connect()
+        return other
+
     def execute_sql_file(self, filepath: str) -> float:
-        """Execute a SQL file and return wall-clock time in seconds."""
-        with open(filepath, "r") as f:
-            sql = f.read()
-        return self.execute(sql)
+        """Execute a SQL file and return wall-clock time in seconds.
+
+        The file is streamed one statement at a time rather than read whole.
+        """
+        return sum(self.execute(stmt) for stmt in iter_statements(filepath))
 
     def execute(self, sql: str) -> float:
         """Execute SQL and return wall-clock time in seconds."""
-        start = time.time()
+        start = _now()
         with self.conn.cursor() as cur:
             cur.execute(sql)
-        elapsed = time.time() - start
+        elapsed = (_now() - start) * 1e-9
         return elapsed
 
-    def execute_query(self, sql: str) -> dict:
-        """Execute a query and return timing + results."""
-        start = time.time()
-        with self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            # Handle multi-statement SQL (e.g., CREATE TABLE + SELECT)
-            statements = [s.strip() for s in sql.split(";") if s.strip()]
-            rows = []
-            for stmt in statements:
-                cur.execute(stmt)
-                if cur.description:
-                    rows = [dict(r) for r in cur.fetchall()]
-        elapsed = time.time() - start
+    def execute_query(self, sql: str, preview_rows: int = None) -> dict:
+        """Execute a query and return timing + results.
+
+        With ``preview_rows``, only that many rows are converted to dicts;
+        ``row_count`` is still the full result size.
+        """
+        if not may_return_rows(sql):
+            # Pure DDL/DML: nothing to fetch, so skip the dict cursor entirely
+            return {"walltime_seconds": self.execute(sql), "rows": [], "row_count": 0}
+
+        start = _now()
+        with self._dict_cursor(sql) as cur:
+            # Multi-statement SQL (e.g., CREATE TABLE + SELECT) goes to the server
+            # as one simple-query message. psycopg2 exposes the final result;
+            # psycopg 3 starts at the first, so step through to the last.
+            cur.execute(sql)
+            if self.use_psycopg3:
+                while cur.nextset():
+                    pass
+            # Rows are already dicts (RealDictRow / dict_row); no need to copy
+            rows, row_count = [], 0
+            if cur.description:
+                if preview_rows is None:
+                    rows = cur.fetchall()
+                    row_count = len(rows)
+                else:
+                    rows = cur.fetchmany(preview_rows)
+                    row_count = cur.rowcount
+        elapsed = (_now() - start) * 1e-9
         return {
             "walltime_seconds": elapsed,
             "rows": rows,
-            "row_count": len(rows),
+            "row_count": row_count,
         }
 
+    def _dict_cursor(self, sql: str):
+        """Open a cursor that returns rows as dicts."""
+        if self.use_psycopg3:
+            from psycopg.rows import dict_row
+
+            # Binary results go through the extended protocol, which only
+            # accepts a single statement; batches stay on the text protocol.
+            binary = ";" not in sql.strip().rstrip(";")
+            return self.conn.cursor(binary=binary, row_factory=dict_row)
+        return self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
     def execute_preagg_pipeline(self, sql_file: str) -> dict:
         """Execute the pre-aggregation pipeline and return per-table timings."""
-        with open(sql_file, "r") as f:
-            full_sql = f.read()
-
-        # Split by DROP/CREATE TABLE statements to time each table separately
+        # Each table's block runs from its DROP TABLE up to the next one, so
+        # any CREATE INDEX statements are timed with the table they belong to.
+        # Only one table's statements are held in memory at a time; they are
+        # re-joined with the separator on its own line so a trailing "--"
+        # comment cannot swallow it.
         timings = {}
-        current_table = None
-        current_sql = []
-
-        for line in full_sql.split("\n"):
-            if line.strip().upper().startswith("DROP TABLE IF EXISTS"):
-                # Save previous table's SQL
-                if current_table and current_sql:
-                    sql = "\n".join(current_sql)
-                    start = time.time()
-                    with self.conn.cursor() as cur:
-                        cur.execute(sql)
-                    timings[current_table] = time.time() - start
-
-                # Extract table name (DROP TABLE IF EXISTS <name> [CASCADE];)
-                parts = line.strip().split()
-                table_name = parts[4] if len(parts) > 4 else "unknown"
-                current_table = table_name.rstrip(";").replace("CASCADE", "").strip()
-                current_sql = [line]
-            elif line.strip().upper().startswith("CREATE INDEX"):
-                # Include index creation with the current table
-                current_sql.append(line)
-            else:
-                if current_table:
-                    current_sql.append(line)
-
-        # Don't forget the last table
-        if current_table and current_sql:
-            sql = "\n".join(current_sql)
-            start = time.time()
-            with self.conn.cursor() as cur:
-                cur.execute(sql)
-            timings[current_table] = time.time() - start
+        table_name = None
+        block = []
+
+        # One cursor serves every table in the pipeline
+        with self.conn.cursor() as cur:
+
+            def run_block():
+                start = _now()
+                cur.execute("\n;\n".join(block))
+                timings[table_name] = (_now() - start) * 1e-9
+
+            for stmt in iter_statements(sql_file):
+                match = _DROP_RE.search(stmt)
+                if match:
+                    if table_name:
+                        run_block()
+                    table_name, block = match.group(1), []
+                if table_name:
+                    block.append(stmt)
+            if table_name:
+                run_block()
 
         return timings
 
+    def execute_blocks(self, blocks):
+        """Execute ``(name, sql)`` blocks in order, yielding ``(name, seconds, error)``.
+
+        All blocks share one cursor, and each block is sent as a single
+        simple-protocol batch (one round-trip per block). A failing block
+        yields its exception with a time of -1 and the remaining blocks still
+        run (the connection is in autocommit mode).
+        """
+        with self.conn.cursor() as cur:
+            for name, sql in blocks:
+                start = _now()
+                try:
+                    cur.execute(sql)
+                except Exception as e:
+                    yield name, -1, e
+                    continue
+                yield name, (_now() - start) * 1e-9, None
+
     def table_row_count(self, table_name: str) -> int:
-        """Get row count for a table."""
+        """Get row count for a table.
+
+        The COUNT(*) is prepared on first use per table, so repeat calls skip
+        the server's parse/plan step.
+        """
         with self.conn.cursor() as cur:
-            cur.execute(f"SELECT COUNT(*) FROM {table_name}")
+            if table_name not in self._prepared_counts:
+                cur.execute(f"PREPARE cnt_{table_name} AS SELECT COUNT(*) FROM {table_name}")
+                self._prepared_counts.add(table_name)
+            cur.execute(f"EXECUTE cnt_{table_name}")
             return cur.fetchone()[0]
@@ -0,0 +1,78 @@
+"""Incremental SQL script reader shared by the database engines."""
+
+import codecs
+import re
+
+# Tokens that start or end a statement, a string/identifier, or a comment
+_TOKEN_RE = re.compile(r"""[;'"]|--|/\*""")
+
+# Closing token for each non-code state
+_STATE_END = {"'": "'", '"': '"', "--": "\n", "/*": "*/"}
+
+# Keywords that can make a statement produce a result set. Deliberately broad
+# (FROM also covers DuckDB's FROM-first queries): a false positive only costs
+# a description check, a false negative would drop rows.
+_ROW_KEYWORD_RE = re.compile(
+    r"\b(SELECT|VALUES|FROM|SHOW|EXPLAIN|DESCRIBE|SUMMARIZE|PRAGMA|CALL|RETURNING)\b",
+    re.I,
+)
+
+
+def may_return_rows(sql: str) -> bool:
+    """Whether any statement in ``sql`` could return rows (e.g. not pure DDL)."""
+    return _ROW_KEYWORD_RE.search(sql) is not None
+
+
+def iter_statements(path: str, bufsize: int = 65536):
+    """Yield the statements of a SQL file one at a time, reading it in chunks.
+
+    Statements are split on ``;`` outside of single-quoted strings, double-quoted
+    identifiers, and ``--`` / ``/* */`` comments, so only the statement being
+    assembled is held in memory. Comment-only fragments are not yielded.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    stmt = ""
+    pos = 0  # scan position within stmt
+    state = None  # None (plain SQL) or a key of _STATE_END
+    has_code = False  # stmt contains something other than whitespace/comments
+
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(bufsize)
+            stmt += decoder.decode(chunk, final=not chunk)
+
+            while True:
+                if state is None:
+                    m = _TOKEN_RE.search(stmt, pos)
+                    if not m:
+                        # Keep the last char unscanned: it may begin "--" or "/*"
+                        scanned = max(pos, len(stmt) - 1) if chunk else len(stmt)
+                        if stmt[pos:scanned].strip():
+                            has_code = True
+                        pos = scanned
+                        break
+                    token = m.group()
+                    if stmt[pos:m.start()].strip() or token in ("'", '"'):
+                        has_code = True
+                    if token == ";":
+                        if has_code:
+                            yield stmt[:m.start()].strip()
+                        stmt = stmt[m.end():]
+                        pos = 0
+                        has_code = False
+                    else:
+                        state = token
+                        pos = m.end()
+                else:
+                    end = stmt.find(_STATE_END[state], pos)
+                    if end == -1:
+                        pos = max(pos, len(stmt) - len(_STATE_END[state]) + 1)
+                        break
+                    pos = end + len(_STATE_END[state])
+                    state = None
+
+            if not chunk:
+                break
+
+    if has_code and stmt.strip():
+        yield stmt.strip()
@@ -8,32 +8,96 @@ Usage:
 """
 
 import argparse
+import contextlib
+import functools
+import hashlib
+import io
 import json
 import math
 import os
+import pickle
+import shutil
+import tarfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import yaml
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+try:
+    import orjson  # optional: pip install -e .[speedups]
+except ImportError:
+    orjson = None
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml-backed, much faster
+except ImportError:
+    from yaml import SafeLoader
+
+# Archive name used by --pack-tar, inside the output directory
+PACKED_QUERIES = "queries.tar"
+
+# Compiled template bytecode persists here across runs
+JINJA_CACHE_DIR = "/tmp/experimentation-benchmark/jinja_cache"
+
+# Parsed experiment/metric configs are pickled here, one file per config dir
+CONFIG_CACHE_DIR = os.path.expanduser("~/.cache/metricbench")
 
 
 def load_configs(config_dir: str) -> tuple:
-    """Load experiment and metric configurations."""
-    with open(os.path.join(config_dir, "experiments.yaml")) as f:
-        exp_config = yaml.safe_load(f)
-    with open(os.path.join(config_dir, "metrics.yaml")) as f:
-        met_config = yaml.safe_load(f)
+    """Load experiment and metric configurations.
+
+    The parsed result is pickled and reused until either YAML file is newer
+    than the cache.
+    """
+    exp_path = os.path.join(config_dir, "experiments.yaml")
+    met_path = os.path.join(config_dir, "metrics.yaml")
+    dir_key = hashlib.sha1(os.path.abspath(config_dir).encode()).hexdigest()[:16]
+    cache_path = os.path.join(CONFIG_CACHE_DIR, f"configs-{dir_key}.pkl")
+
+    try:
+        yaml_mtime = max(os.stat(p).st_mtime_ns for p in (exp_path, met_path))
+        if os.stat(cache_path).st_mtime_ns > yaml_mtime:
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    with open(exp_path) as f:
+        exp_config = yaml.load(f, Loader=SafeLoader)
+    with open(met_path) as f:
+        met_config = yaml.load(f, Loader=SafeLoader)
+
+    try:
+        Path(CONFIG_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "wb") as f:
+            pickle.dump((exp_config, met_config), f)
+    except OSError:
+        pass  # caching is best-effort
+
     return exp_config, met_config
 
 
+def _window_key(exp: dict) -> tuple:
+    """The experiment fields that determine its conversion window, as a hashable key."""
+    return (
+        exp.get("delay_hours", 0),
+        exp.get("conversion_window_hours", 72),
+        exp.get("window_type", "conversion"),
+        exp.get("attribution", "first_exposure"),
+        exp.get("end_date", "2022-02-01T00:00:00"),
+    )
+
+
 def build_conversion_window_clause(exp: dict, unit_alias: str, metric_alias: str) -> str:
     """Build the timestamp comparison for conversion windows (on-demand approach)."""
-    delay_hours = exp.get("delay_hours", 0)
-    window_hours = exp.get("conversion_window_hours", 72)
-    window_type = exp.get("window_type", "conversion")
-    attribution = exp.get("attribution", "first_exposure")
-    end_date = exp.get("end_date", "2022-02-01T00:00:00")
+    return _conversion_clause_cached(*_window_key(exp), unit_alias, metric_alias)
+
 
+@functools.lru_cache(maxsize=None)
+def _conversion_clause_cached(
+    delay_hours, window_hours, window_type, attribution, end_date, unit_alias, metric_alias
+) -> str:
     base_col = f"{unit_alias}.first_exposure_timestamp"
     metric_col = f"{metric_alias}.timestamp"
 
@@ -67,67 +131,62 @@ def build_conversion_window_clause(exp: dict, unit_alias: str, metric_alias: str
     return clause
 
 
-def build_preagg_window_clause(exp: dict) -> str:
-    """Build the date-level window clause for pre-aggregated approach."""
-    delay_hours = exp.get("delay_hours", 0)
-    window_hours = exp.get("conversion_window_hours", 72)
-    window_type = exp.get("window_type", "conversion")
-    attribution = exp.get("attribution", "first_exposure")
-    end_date = exp.get("end_date", "2022-02-01T00:00:00")
+def build_preagg_window_clause(exp: dict, alias: str = "m") -> str:
+    """Build the date-level window clause for pre-aggregated approach.
+
+    ``alias`` is the table alias whose ``metric_date`` is constrained.
+    """
+    return _preagg_clause_cached(*_window_key(exp), alias)
+
 
+@functools.lru_cache(maxsize=None)
+def _preagg_clause_cached(
+    delay_hours, window_hours, window_type, attribution, end_date, alias
+) -> str:
+    date_col = f"{alias}.metric_date"
     delay_days = math.floor(delay_hours / 24) if delay_hours < 0 else math.ceil(delay_hours / 24)
     window_days = math.ceil(window_hours / 24)
 
     # Start of window
     if delay_days < 0:
-        start = f"m.metric_date >= CAST(u.first_exposure - INTERVAL '{abs(delay_days)} days' AS DATE)"
+        start = f"{date_col} >= CAST(u.first_exposure - INTERVAL '{abs(delay_days)} days' AS DATE)"
     elif delay_days > 0:
-        start = f"m.metric_date >= CAST(u.first_exposure + INTERVAL '{delay_days} days' AS DATE)"
+        start = f"{date_col} >= CAST(u.first_exposure + INTERVAL '{delay_days} days' AS DATE)"
     else:
-        start = "m.metric_date >= CAST(u.first_exposure AS DATE)"
+        start = f"{date_col} >= CAST(u.first_exposure AS DATE)"
 
     # End of window
     if attribution == "experiment_duration":
-        end = f"m.metric_date <= '{end_date}'::date"
+        end = f"{date_col} <= '{end_date}'::date"
     else:
         total_days = delay_days + window_days
         if total_days >= 0:
-            end = f"m.metric_date <= CAST(u.first_exposure + INTERVAL '{total_days} days' AS DATE)"
+            end = f"{date_col} <= CAST(u.first_exposure + INTERVAL '{total_days} days' AS DATE)"
         else:
-            end = f"m.metric_date <= CAST(u.first_exposure - INTERVAL '{abs(total_days)} days' AS DATE)"
+            end = f"{date_col} <= CAST(u.first_exposure - INTERVAL '{abs(total_days)} days' AS DATE)"
 
     clause = f"{start}\n    AND {end}"
 
     # Lookback
     if window_type == "lookback":
-        clause += f"\n    AND m.metric_date + {window_days} >= '{end_date}'::date"
+        clause += f"\n    AND {date_col} + {window_days} >= '{end_date}'::date"
 
     return clause
 
 
 def build_preagg_sketch_window_clause(exp: dict) -> str:
     """Same as preagg window but for sketch tables (uses s. alias)."""
-    clause = build_preagg_window_clause(exp)
-    return clause.replace("m.metric_date", "s.metric_date")
+    return build_preagg_window_clause(exp, alias="s")
 
 
-def generate_query(
-    env: Environment,
-    approach: str,
-    exp: dict,
-    defaults: dict,
-    metric: dict,
-    variant: str = "standard",
-    use_tdigest: bool = False,
-    use_approx_quantile: bool = False,
-) -> str:
-    """Generate a single SQL query from templates."""
-    # Merge experiment with defaults
-    merged_exp = {**defaults, **exp}
+def render_units(templates: dict, approach: str, merged_exp: dict) -> str:
+    """Render the units CTE for an experiment (already merged with defaults).
 
-    # Build units CTE
-    units_template = env.get_template(f"{approach}/units.sql.j2")
-    units_cte = units_template.render(
+    The CTE depends only on the experiment, so it can be rendered once and
+    shared by every metric and variant of that experiment.
+    """
+    units_template = templates[(approach, "units")]
+    return units_template.render(
         exposure_table=merged_exp.get("exposure_table", "viewed_experiment"),
         experiment_id=merged_exp["experiment_id"],
         start_date=merged_exp["start_date"],
@@ -142,14 +201,22 @@ def generate_query(
         else None,
     )
 
+
+def render_metric(
+    templates: dict,
+    approach: str,
+    merged_exp: dict,
+    metric: dict,
+    units_cte: str,
+    variant: str = "standard",
+    use_tdigest: bool = False,
+    use_approx_quantile: bool = False,
+) -> str:
+    """Render the full metric query around a pre-rendered units CTE."""
     # Build conversion window clause
     if approach == "ondemand":
-        conv_clause = build_conversion_window_clause(merged_exp, "u", "m")
-
         def conversion_window_clause(u_alias, m_alias):
             return build_conversion_window_clause(merged_exp, u_alias, m_alias)
-    else:
-        conv_clause = build_preagg_window_clause(merged_exp)
 
     # Determine CUPED and capping
     cuped = metric.get("cuped") if metric.get("cuped", {}).get("enabled") else None
@@ -159,7 +226,7 @@ def generate_query(
     weighted = variant == "weighted"
 
     # Build metric query
-    metric_template = env.get_template(f"{approach}/metric.sql.j2")
+    metric_template = templates[(approach, "metric")]
 
     dimension = merged_exp.get("dimension")
     dimension_is_activation = (
@@ -197,6 +264,98 @@ def generate_query(
     return rendered
 
 
+def generate_query(
+    templates: dict,
+    approach: str,
+    merged_exp: dict,
+    metric: dict,
+    variant: str = "standard",
+    use_tdigest: bool = False,
+    use_approx_quantile: bool = False,
+) -> str:
+    """Generate a single SQL query from templates.
+
+    ``templates`` maps ``(approach, kind)`` to a loaded template, where kind
+    is ``"units"`` or ``"metric"`` (see ``load_templates``). ``merged_exp`` is
+    the experiment already merged over the config defaults.
+    """
+    units_cte = render_units(templates, approach, merged_exp)
+    return render_metric(
+        templates, approach, merged_exp, metric, units_cte,
+        variant=variant,
+        use_tdigest=use_tdigest,
+        use_approx_quantile=use_approx_quantile,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_templates(template_dir: str) -> dict:
+    """Load (once per process) every units/metric template for both approaches."""
+    Path(JINJA_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+    env = Environment(
+        loader=FileSystemLoader(template_dir),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR),
+    )
+    return {
+        (approach, kind): env.get_template(f"{approach}/{kind}.sql.j2")
+        for approach in ("ondemand", "preagg")
+        for kind in ("units", "metric")
+    }
+
+
+def _write_file(path: str, data: bytes):
+    """Write bytes to a file with raw os-level calls (no Python buffering layer)."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _render_one(task: tuple):
+    """Render one SQL file; returns ``(manifest entry, sql)`` or None on error.
+
+    When ``output_dir`` is set the file is written here and ``sql`` is None;
+    otherwise the rendered SQL is handed back to the parent (for --pack-tar).
+    Runs inside a worker process, so the Jinja2 templates are loaded there
+    rather than pickled from the parent.
+    """
+    (
+        approach, exp, metric, variant, approx_quantile, template_dir, output_dir, units_cte,
+    ) = task
+
+    if approach == "ondemand":
+        filename = f"ondemand/{exp['id']}__{metric['id']}.sql"
+    else:
+        filename = f"preagg/{exp['id']}__{metric['id']}__{variant}.sql"
+
+    try:
+        sql = render_metric(
+            load_templates(template_dir), approach, exp, metric, units_cte,
+            variant=variant,
+            use_approx_quantile=approx_quantile,
+        )
+        if output_dir:
+            _write_file(os.path.join(output_dir, filename), sql.encode())
+            sql = None
+    except Exception as e:
+        print(f"  WARN: {os.path.splitext(filename)[0]}: {e}")
+        return None
+
+    entry = {
+        "experiment": exp["id"],
+        "metric": metric["id"],
+        "approach": approach,
+        "variant": variant,
+        "file": filename,
+    }
+    return entry, sql
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate benchmark SQL queries")
     parser.add_argument(
@@ -229,6 +388,11 @@ def main():
         action="store_true",
         help="Use DuckDB approx_quantile for quantile metrics (built-in T-Digest)",
     )
+    parser.add_argument(
+        "--pack-tar",
+        action="store_true",
+        help=f"Write all SQL into a single {PACKED_QUERIES} archive instead of one file each",
+    )
     args = parser.parse_args()
 
     # Load configs
@@ -245,74 +409,80 @@ def main():
         met_ids = set(args.metrics.split(","))
         metrics = [m for m in metrics if m["id"] in met_ids]
 
-    # Set up Jinja2
-    env = Environment(
-        loader=FileSystemLoader(args.template_dir),
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
-
-    # Output directories
-    for approach in ["ondemand", "preagg"]:
-        Path(os.path.join(args.output, approach)).mkdir(parents=True, exist_ok=True)
-
-    # Generate all queries
-    query_manifest = []
-    total = 0
-
+    # Output directories. The runner prefers the archive over loose files, so
+    # whichever layout this run doesn't write is removed rather than left stale.
+    Path(args.output).mkdir(parents=True, exist_ok=True)
+    if args.pack_tar:
+        for approach in ["ondemand", "preagg"]:
+            shutil.rmtree(os.path.join(args.output, approach), ignore_errors=True)
+    else:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(args.output, PACKED_QUERIES))
+        for approach in ["ondemand", "preagg"]:
+            Path(os.path.join(args.output, approach)).mkdir(parents=True, exist_ok=True)
+
+    # One task per output file: on-demand gets a single "standard" query per
+    # experiment x metric, pre-agg gets both the unweighted and weighted variants.
+    # The units CTE only depends on the experiment, so it is rendered once here.
+    templates = load_templates(args.template_dir)
+    tasks = []
     for exp in experiments:
-        for metric in metrics:
-            # On-demand approach: one query per experiment x metric
+        merged_exp = {**defaults, **exp}
+        # A failed units CTE only drops that approach's files, each with the
+        # same WARN its own render failure would print
+        units, unit_errors = {}, {}
+        for approach in ("ondemand", "preagg"):
             try:
-                sql = generate_query(
-                    env, "ondemand", exp, defaults, metric,
-                    use_approx_quantile=args.approx_quantile,
-                )
-                filename = f"ondemand/{exp['id']}__{metric['id']}.sql"
-                filepath = os.path.join(args.output, filename)
-                with open(filepath, "w") as f:
-                    f.write(sql)
-                query_manifest.append(
-                    {
-                        "experiment": exp["id"],
-                        "metric": metric["id"],
-                        "approach": "ondemand",
-                        "variant": "standard",
-                        "file": filename,
-                    }
-                )
-                total += 1
+                units[approach] = render_units(templates, approach, merged_exp)
             except Exception as e:
-                print(f"  WARN: ondemand/{exp['id']}__{metric['id']}: {e}")
-
-            # Pre-agg approach: unweighted variant
-            for variant in ["unweighted", "weighted"]:
-                try:
-                    sql = generate_query(
-                        env, "preagg", exp, defaults, metric, variant=variant,
-                        use_approx_quantile=args.approx_quantile,
-                    )
-                    filename = f"preagg/{exp['id']}__{metric['id']}__{variant}.sql"
-                    filepath = os.path.join(args.output, filename)
-                    with open(filepath, "w") as f:
-                        f.write(sql)
-                    query_manifest.append(
-                        {
-                            "experiment": exp["id"],
-                            "metric": metric["id"],
-                            "approach": "preagg",
-                            "variant": variant,
-                            "file": filename,
-                        }
+                unit_errors[approach] = e
+        for metric in metrics:
+            for approach, variant in [
+                ("ondemand", "standard"),
+                ("preagg", "unweighted"),
+                ("preagg", "weighted"),
+            ]:
+                if approach in unit_errors:
+                    name = f"{exp['id']}__{metric['id']}"
+                    if approach == "preagg":
+                        name += f"__{variant}"
+                    print(f"  WARN: {approach}/{name}: {unit_errors[approach]}")
+                    continue
+                tasks.append(
+                    (
+                        approach, merged_exp, metric, variant,
+                        args.approx_quantile, args.template_dir,
+                        None if args.pack_tar else args.output,
+                        units[approach],
                     )
-                    total += 1
-                except Exception as e:
-                    print(f"  WARN: preagg/{exp['id']}__{metric['id']}__{variant}: {e}")
+                )
+
+    # Rendering is pure-CPU and independent per file, so fan it out across
+    # processes. map() preserves task order, keeping the manifest deterministic.
+    query_manifest = []
+    with ProcessPoolExecutor() as ex:
+        results = (r for r in ex.map(_render_one, tasks, chunksize=16) if r is not None)
+        if args.pack_tar:
+            # Members keep the manifest's relative paths (ondemand/..., preagg/...)
+            with tarfile.open(os.path.join(args.output, PACKED_QUERIES), "w") as tar:
+                for entry, sql in results:
+                    data = sql.encode()
+                    info = tarfile.TarInfo(entry["file"])
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+                    query_manifest.append(entry)
+        else:
+            query_manifest = [entry for entry, _ in results]
+    total = len(query_manifest)
 
     # Write manifest
     manifest_path = os.path.join(args.output, "manifest.json")
-    with open(manifest_path, "w") as f:
-        json.dump(query_manifest, f, indent=2)
+    if orjson is not None:
+        with open(manifest_path, "wb") as f:
+            f.write(orjson.dumps(query_manifest, option=orjson.OPT_INDENT_2))
+    else:
+        with open(manifest_path, "w") as f:
+            json.dump(query_manifest, f, indent=2)
 
     print(f"Generated {total} SQL files in {args.output}/")
     print(f"  On-demand: {sum(1 for q in query_manifest if q['approach'] == 'ondemand')}")
@@ -15,24 +15,58 @@ Options:
     --metrics purchased_items,... Comma-separated metric filter
     --validate                    Compare results between approaches
     --output results.json         Output file path
-    --warmup 1                    Number of warmup runs (not timed)
+    --warmup 1                    Number of warmup runs (timed separately as cold runs)
     --runs 3                      Number of timed runs (takes median)
+    --parallelism 1               Concurrent query workers, one DB session each
+    --force-preagg                Rebuild pre-agg tables even if inputs are unchanged
 """
 
 import argparse
+import contextlib
+import functools
+import hashlib
 import json
+import operator
 import os
-import statistics
-import time
+import queue
+import re
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import yaml
 
+try:
+    import orjson  # optional: pip install -e .[speedups]
+except ImportError:
+    orjson = None
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml-backed, much faster
+except ImportError:
+    from yaml import SafeLoader
+
+from benchmark.generate_queries import CONFIG_CACHE_DIR, PACKED_QUERIES
+
+# Rows kept per query result (for validation); the rest are only counted
+PREVIEW_ROWS = 5
+
+# Records the inputs and timings of the last successful pre-agg build
+PREAGG_STATE_FILE = "preagg-state-{engine}.json"
+
+# Suffix of the load state data.load_data writes next to a DuckDB database
+LOAD_STATE_SUFFIX = ".loaded.json"
+
+# Line that starts a new table's block in the pre-agg script
+_DROP_TABLE_RE = re.compile(r"^[ \t]*DROP\s+TABLE\s+IF\s+EXISTS\s+(\w+)", re.I | re.M)
+
 
 def load_config(config_path: str) -> dict:
     with open(config_path) as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=SafeLoader)
 
 
 def create_engine(engine_name: str, config: dict):
@@ -44,127 +78,319 @@ def create_engine(engine_name: str, config: dict):
     elif engine_name == "postgres":
         from benchmark.engines.postgres import PostgresEngine
 
-        return PostgresEngine(config["postgres"])
+        return PostgresEngine(
+            config["postgres"],
+            use_psycopg3=config["postgres"].get("use_psycopg3", False),
+        )
     else:
         raise ValueError(f"Unknown engine: {engine_name}")
 
 
-def run_preagg_pipeline(engine, schemas_dir: str, engine_name: str) -> dict:
-    """Build all pre-aggregated tables and return per-table timings."""
-    print("\n=== Building Pre-Aggregation Pipeline ===")
-    preagg_file = os.path.join(schemas_dir, engine_name, "preagg_tables.sql")
+def _parse_preagg_script(path: str) -> list:
+    """Split a pre-agg script into ``[(table_name, sql), ...]``, one per table.
 
-    with open(preagg_file) as f:
+    Each block starts at its ``DROP TABLE IF EXISTS <name>`` line and runs up to
+    the next one. The parsed list is cached as JSON and reused until the script
+    is newer than the cache.
+    """
+    path_key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    cache_path = os.path.join(CONFIG_CACHE_DIR, f"preagg-{path_key}.json")
+
+    try:
+        if os.stat(cache_path).st_mtime_ns > os.stat(path).st_mtime_ns:
+            with open(cache_path) as f:
+                return [tuple(block) for block in json.load(f)]
+    except (OSError, ValueError):
+        pass
+
+    with open(path) as f:
         full_sql = f.read()
 
-    # Split into individual statements and execute them
+    anchors = list(_DROP_TABLE_RE.finditer(full_sql))
+    blocks = []
+    for k, m in enumerate(anchors):
+        # Anything before the first DROP (header comments) rides along with it
+        start = m.start() if k else 0
+        end = anchors[k + 1].start() if k + 1 < len(anchors) else len(full_sql)
+        blocks.append((m.group(1), full_sql[start:end]))
+
+    try:
+        Path(CONFIG_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump(blocks, f)
+    except OSError:
+        pass  # caching is best-effort
+
+    return blocks
+
+
+def _preagg_signature(
+    schemas_dir: str, engine_name: str, engine_config: dict, csv_dir: str
+) -> str:
+    """Fingerprint everything a pre-agg build depends on, or None if unknown.
+
+    Covers the pre-agg script's contents, the raw data and the connection
+    settings (so a different database never matches). For DuckDB the raw data
+    is the load state ``data.load_data`` recorded for the database (CSV
+    hashes, ``raw_tables.sql`` and load mode); without one there is nothing
+    to trust, so None is returned. Postgres loads record no state, so the
+    source CSVs' sizes and mtimes stand in.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(os.path.join(schemas_dir, engine_name, "preagg_tables.sql"), "rb") as f:
+        h.update(f.read())
+    if engine_name == "duckdb":
+        try:
+            with open(engine_config.get("database", ":memory:") + LOAD_STATE_SUFFIX, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            return None
+    else:
+        for name in sorted(os.listdir(csv_dir)) if os.path.isdir(csv_dir) else []:
+            if name.endswith(".csv"):
+                st = os.stat(os.path.join(csv_dir, name))
+                h.update(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode())
+    h.update(json.dumps(engine_config, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def _read_preagg_state(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_preagg_state(path: str, state: dict):
+    try:
+        Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # the state file is only an optimization
+
+
+def _tables_exist(engine, names: list) -> bool:
+    """Whether every table in ``names`` exists in the connected database."""
+    quoted = ", ".join(f"'{n.lower()}'" for n in names)
+    result = engine.execute_query(
+        "SELECT table_name FROM information_schema.tables "
+        f"WHERE lower(table_name) IN ({quoted})"
+    )
+    found = {row["table_name"].lower() for row in result["rows"]}
+    return found >= {n.lower() for n in names}
+
+
+def run_preagg_pipeline(
+    engine,
+    schemas_dir: str,
+    engine_name: str,
+    state_path: str = None,
+    signature: str = None,
+    force: bool = False,
+) -> tuple:
+    """Build all pre-aggregated tables and return ``(timings, cached)``.
+
+    If ``state_path`` records ``signature`` from a previous successful build
+    and all the tables still exist, the build is skipped (unless ``force``)
+    and the timings measured by that build are returned with ``cached=True``.
+    """
+    print("\n=== Building Pre-Aggregation Pipeline ===")
+    preagg_file = os.path.join(schemas_dir, engine_name, "preagg_tables.sql")
+    blocks = _parse_preagg_script(preagg_file)
+    names = [name for name, _ in blocks]
+
+    state = _read_preagg_state(state_path) if state_path else {}
+    if (
+        not force
+        and signature
+        and state.get("signature") == signature
+        and set(state.get("timings", {})) == set(names)
+        and _tables_exist(engine, names)
+    ):
+        timings = state["timings"]
+        for name in names:
+            print(f"  {name}: {timings[name]:.3f}s (cached)")
+        total = sum(t for t in timings.values() if t > 0)
+        print(f"  TOTAL pipeline: {total:.3f}s (cached build, --force-preagg to rebuild)")
+        return timings, True
+
+    # Forget the old build before touching its tables
+    if state_path and state:
+        with contextlib.suppress(OSError):
+            os.remove(state_path)
+
     timings = {}
-    current_name = None
-    statements = []
-
-    for line in full_sql.split("\n"):
-        stripped = line.strip()
-
-        # Track which table we're building
-        if stripped.upper().startswith("DROP TABLE IF EXISTS"):
-            # Execute previous batch if any
-            if current_name and statements:
-                sql = "\n".join(statements)
-                start = time.time()
-                try:
-                    engine.execute(sql)
-                    timings[current_name] = time.time() - start
-                    print(f"  {current_name}: {timings[current_name]:.3f}s")
-                except Exception as e:
-                    print(f"  {current_name}: ERROR - {e}")
-                    timings[current_name] = -1
-                statements = []
-
-            # Extract table name (DROP TABLE IF EXISTS <name> [CASCADE];)
-            parts = stripped.split()
-            if len(parts) >= 5:
-                current_name = parts[4].rstrip(";").replace("CASCADE", "").strip()
-            statements.append(line)
+    for name, elapsed, error in engine.execute_blocks(blocks):
+        timings[name] = elapsed
+        if error is not None:
+            print(f"  {name}: ERROR - {error}")
         else:
-            statements.append(line)
-
-    # Execute last batch
-    if current_name and statements:
-        sql = "\n".join(statements)
-        start = time.time()
-        try:
-            engine.execute(sql)
-            timings[current_name] = time.time() - start
-            print(f"  {current_name}: {timings[current_name]:.3f}s")
-        except Exception as e:
-            print(f"  {current_name}: ERROR - {e}")
-            timings[current_name] = -1
+            print(f"  {name}: {elapsed:.3f}s")
 
     total = sum(t for t in timings.values() if t > 0)
     print(f"  TOTAL pipeline: {total:.3f}s")
-    return timings
 
+    if state_path and signature and all(t >= 0 for t in timings.values()):
+        _write_preagg_state(state_path, {"signature": signature, "timings": timings})
+    return timings, False
+
+
+def load_packed_queries(queries_dir: str) -> dict:
+    """Read a --pack-tar query archive into {manifest file: sql}, if one exists."""
+    tar_path = os.path.join(queries_dir, PACKED_QUERIES)
+    if not os.path.exists(tar_path):
+        return {}
+    with tarfile.open(tar_path) as tar:
+        return {
+            member.name: tar.extractfile(member).read().decode()
+            for member in tar.getmembers()
+            if member.isfile()
+        }
 
-def run_queries(engine, queries_dir: str, manifest: list, warmup: int, runs: int) -> list:
-    """Execute all queries in the manifest and return timed results."""
-    results = []
-    total = len(manifest)
 
-    for i, entry in enumerate(manifest):
-        filepath = os.path.join(queries_dir, entry["file"])
-        if not os.path.exists(filepath):
-            print(f"  SKIP [{i+1}/{total}] {entry['file']} (not found)")
+def load_query_sql(queries_dir: str, manifest: list) -> dict:
+    """Read each manifest query's SQL once, as {manifest file: sql}.
+
+    Queries come from the --pack-tar archive when there is one; otherwise the
+    individual files are read concurrently. Files that don't exist are left out.
+    """
+    sql_cache = load_packed_queries(queries_dir)
+    to_read = dict.fromkeys(m["file"] for m in manifest if m["file"] not in sql_cache)
+
+    def read(name):
+        try:
+            with open(os.path.join(queries_dir, name)) as f:
+                return name, f.read()
+        except FileNotFoundError:
+            return name, None
+
+    with ThreadPoolExecutor() as ex:
+        for name, sql in ex.map(read, to_read):
+            if sql is not None:
+                sql_cache[name] = sql
+    return sql_cache
+
+
+def _median(values: list) -> float:
+    """Median of a short, non-empty list of timings (same result as statistics.median)."""
+    if len(values) == 3:
+        a, b, c = values
+        return max(min(a, b), min(max(a, b), c))
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[mid]
+    return (ordered[mid - 1] + ordered[mid]) / 2
+
+
+def _run_one(
+    engine, sql_cache: dict, i: int, total: int, entry: dict, warmup: int, runs: int
+):
+    """Warm up and time a single manifest entry; returns its result (None if skipped)."""
+    sql = sql_cache.get(entry["file"])
+    if sql is None:
+        print(f"  SKIP [{i+1}/{total}] {entry['file']} (not found)")
+        return None
+
+    name = f"{entry['approach']} > {entry['experiment']} > {entry['metric']}"
+    if entry.get("variant") and entry["variant"] != "standard":
+        name += f" > {entry['variant']}"
+
+    # Every run is timed: the first `warmup` runs are reported as cold
+    # timings, and only the remaining `runs` count towards the median
+    cold_timings = []
+    timings = []
+    last_result = None
+    for r in range(warmup + runs):
+        is_warmup = r < warmup
+        try:
+            result = engine.execute_query(sql, preview_rows=PREVIEW_ROWS)
+        except Exception as e:
+            if not is_warmup:
+                print(f"  ERROR [{i+1}/{total}] {name}: {e}")
+            (cold_timings if is_warmup else timings).append(-1)
             continue
+        if is_warmup:
+            cold_timings.append(result["walltime_seconds"])
+        else:
+            timings.append(result["walltime_seconds"])
+            last_result = result
+
+    valid_timings = [t for t in timings if t >= 0]
+    median_time = _median(valid_timings) if valid_timings else -1
+
+    result_entry = {
+        "experiment": entry["experiment"],
+        "metric": entry["metric"],
+        "approach": entry["approach"],
+        "variant": entry.get("variant", "standard"),
+        "walltime_seconds": round(median_time, 6),
+        "all_timings": [round(t, 6) for t in timings],
+        "cold_timings": [round(t, 6) for t in cold_timings],
+        "row_count": last_result["row_count"] if last_result else 0,
+        "rows": last_result["rows"] if last_result else [],  # first rows, for validation
+    }
 
-        with open(filepath) as f:
-            sql = f.read()
+    if (i + 1) % 50 == 0 or i == 0:
+        print(f"  [{i+1}/{total}] {name}: {median_time:.4f}s")
 
-        name = f"{entry['approach']} > {entry['experiment']} > {entry['metric']}"
-        if entry.get("variant") and entry["variant"] != "standard":
-            name += f" > {entry['variant']}"
+    return result_entry
 
-        # Warmup runs
-        for _ in range(warmup):
-            try:
-                engine.execute_query(sql)
-            except Exception:
-                break
-
-        # Timed runs
-        timings = []
-        last_result = None
-        for r in range(runs):
+
+def run_queries(
+    engine, sql_cache: dict, manifest: list, warmup: int, runs: int, parallelism: int = 1
+) -> list:
+    """Execute all queries in the manifest and return timed results.
+
+    With ``parallelism`` > 1, queries are spread over that many worker threads,
+    each with its own database session (``engine.clone()``). Results keep
+    manifest order either way.
+    """
+    total = len(manifest)
+
+    def run(task):
+        i, entry, worker_engine = task
+        return _run_one(worker_engine, sql_cache, i, total, entry, warmup, runs)
+
+    if parallelism <= 1:
+        results = [run((i, entry, engine)) for i, entry in enumerate(manifest)]
+        return [r for r in results if r is not None]
+
+    # Sessions are checked out of a pool so no two threads share one
+    sessions = queue.Queue()
+    clones = []
+    try:
+        for _ in range(parallelism - 1):
+            clones.append(engine.clone())
+        for session in [engine] + clones:
+            sessions.put(session)
+
+        def run_pooled(indexed_entry):
+            session = sessions.get()
             try:
-                result = engine.execute_query(sql)
-                timings.append(result["walltime_seconds"])
-                last_result = result
-            except Exception as e:
-                print(f"  ERROR [{i+1}/{total}] {name}: {e}")
-                timings.append(-1)
-
-        valid_timings = [t for t in timings if t >= 0]
-        median_time = statistics.median(valid_timings) if valid_timings else -1
-
-        result_entry = {
-            "experiment": entry["experiment"],
-            "metric": entry["metric"],
-            "approach": entry["approach"],
-            "variant": entry.get("variant", "standard"),
-            "walltime_seconds": round(median_time, 6),
-            "all_timings": [round(t, 6) for t in timings],
-            "row_count": last_result["row_count"] if last_result else 0,
-            "rows": last_result["rows"][:5] if last_result else [],  # first 5 rows for validation
-        }
-        results.append(result_entry)
+                return run((*indexed_entry, session))
+            finally:
+                sessions.put(session)
+
+        with ThreadPoolExecutor(max_workers=parallelism) as ex:
+            results = list(ex.map(run_pooled, enumerate(manifest)))
+    finally:
+        for session in clones:
+            session.close()
 
-        if (i + 1) % 50 == 0 or i == 0:
-            print(f"  [{i+1}/{total}] {name}: {median_time:.4f}s")
+    return [r for r in results if r is not None]
 
-    return results
 
+def compute_summary(results: list, pipeline_timings: dict, parallelism: int = 1) -> dict:
+    """Compute summary statistics from benchmark results.
 
-def compute_summary(results: list, pipeline_timings: dict) -> dict:
-    """Compute summary statistics from benchmark results."""
+    With ``parallelism`` > 1 the queries ran concurrently, so their timings
+    include contention and the totals are not sequential wall time.
+    """
     ondemand_times = [
         r["walltime_seconds"]
         for r in results
@@ -183,17 +409,20 @@ def compute_summary(results: list, pipeline_timings: dict) -> dict:
     preagg_total = sum(preagg_times) if preagg_times else 0
 
     return {
+        "query_timings": f"concurrent ({parallelism} sessions)"
+        if parallelism > 1
+        else "sequential",
         "ondemand_query_count": len(ondemand_times),
         "ondemand_total_seconds": round(ondemand_total, 3),
         "ondemand_median_per_query": round(
-            statistics.median(ondemand_times), 6
+            float(np.median(ondemand_times)), 6
         )
         if ondemand_times
         else 0,
         "preagg_query_count": len(preagg_times),
         "preagg_total_seconds": round(preagg_total, 3),
         "preagg_median_per_query": round(
-            statistics.median(preagg_times), 6
+            float(np.median(preagg_times)), 6
         )
         if preagg_times
         else 0,
@@ -213,28 +442,6 @@ def compute_summary(results: list, pipeline_timings: dict) -> dict:
     }
 
 
-def _pct_diff(a: float, b: float) -> float:
-    """Symmetric percentage difference between two values."""
-    if a == 0 and b == 0:
-        return 0.0
-    denom = max(abs(a), abs(b))
-    if denom == 0:
-        return 0.0
-    return abs(a - b) / denom * 100
-
-
-def _extract_field_totals(rows: list, field: str) -> float:
-    """Sum a field across all result rows (handles variation-level aggregation)."""
-    total = 0.0
-    for r in rows:
-        if isinstance(r, dict) and r.get(field) is not None:
-            try:
-                total += float(r[field])
-            except (TypeError, ValueError):
-                pass
-    return total
-
-
 def validate_results(results: list) -> dict:
     """Compare on-demand vs pre-agg results for the same experiment x metric.
 
@@ -247,105 +454,122 @@ def validate_results(results: list) -> dict:
     """
     # Fields to compare, in priority order (first match wins)
     COMPARE_FIELDS = ["users", "main_sum", "quantile_value"]
+    KEYS = ["experiment", "metric"]
+
+    if not results:
+        return {
+            "total_comparisons": 0,
+            "exact_lt_1pct": 0,
+            "close_1_to_10pct": 0,
+            "far_gt_10pct": 0,
+            "skipped": 0,
+            "diff_stats": {},
+            "top_outliers": [],
+        }
 
-    # Group by experiment + metric
-    grouped = {}
-    for r in results:
-        key = f"{r['experiment']}__{r['metric']}"
-        if key not in grouped:
-            grouped[key] = {}
-        approach_key = f"{r['approach']}_{r.get('variant', 'standard')}"
-        grouped[key][approach_key] = r
-
-    comparisons = []
-    skipped = 0
-
-    for key, approaches in grouped.items():
-        ondemand = approaches.get("ondemand_standard")
-
-        # Compare against both unweighted and weighted preagg
-        for variant_key, variant_label in [
-            ("preagg_unweighted", "unweighted"),
-            ("preagg_weighted", "weighted"),
-        ]:
-            preagg = approaches.get(variant_key)
-            if not ondemand or not preagg:
-                skipped += 1
-                continue
-
-            od_rows = ondemand.get("rows", [])
-            pa_rows = preagg.get("rows", [])
-
-            if not od_rows or not pa_rows:
-                skipped += 1
-                continue
-
-            comp = {
-                "key": key,
-                "variant": variant_label,
-                "diffs": {},
-            }
+    frame = pd.DataFrame(
+        {
+            "experiment": [r["experiment"] for r in results],
+            "metric": [r["metric"] for r in results],
+            "approach": [f"{r['approach']}_{r.get('variant', 'standard')}" for r in results],
+            "rows": [r.get("rows", []) for r in results],
+        }
+    )
+    # A later result for the same experiment x metric x approach wins
+    frame = frame.drop_duplicates(subset=KEYS + ["approach"], keep="last")
+
+    # Per-result field totals: one line per row (engine rows are always
+    # dicts). Results without rows can't be compared and are left out.
+    has_rows = frame["rows"].map(len) > 0
+    exploded = frame.loc[has_rows, "rows"].explode()
+    values = pd.DataFrame(exploded.tolist(), columns=COMPARE_FIELDS, index=exploded.index)
+    # Plain int/float columns are summed as-is; only mixed columns (Decimal,
+    # strings) need coercing, with non-numeric values ignored
+    for field in COMPARE_FIELDS:
+        if not pd.api.types.is_numeric_dtype(values[field]):
+            values[field] = pd.to_numeric(values[field], errors="coerce")
+    # Summed left to right like a plain loop (pandas' own sum is compensated,
+    # which can move the last bit and with it a rounded diff)
+    sums = values.groupby(level=0).agg(
+        lambda column: functools.reduce(operator.add, column.dropna().tolist(), 0.0)
+    )
+    totals = frame.loc[has_rows, KEYS + ["approach"]].join(sums)
+    totals = totals.assign(found=True)
+
+    # One candidate pair per experiment x metric x preagg variant, in result order
+    keys = frame[KEYS].drop_duplicates()
+    pairs = pd.concat(
+        [keys.assign(variant=v, order=np.arange(len(keys))) for v in ("unweighted", "weighted")]
+    ).sort_values("order", kind="stable")
+    ondemand = totals[totals["approach"] == "ondemand_standard"].drop(columns="approach")
+    preagg = totals[totals["approach"].str.startswith("preagg_")]
+    preagg = preagg.assign(variant=preagg["approach"].str.slice(len("preagg_")))
+    pairs = pairs.merge(ondemand, on=KEYS, how="left").merge(
+        preagg.drop(columns="approach"), on=KEYS + ["variant"], how="left", suffixes=("_od", "_pa")
+    )
 
-            has_any_value = False
-            for field in COMPARE_FIELDS:
-                od_val = _extract_field_totals(od_rows, field)
-                pa_val = _extract_field_totals(pa_rows, field)
-
-                if od_val == 0 and pa_val == 0:
-                    continue
-
-                has_any_value = True
-                diff = _pct_diff(od_val, pa_val)
-                comp["diffs"][field] = {
-                    "ondemand": round(od_val, 4),
-                    "preagg": round(pa_val, 4),
-                    "diff_pct": round(diff, 2),
-                }
-
-            if has_any_value:
-                # Overall diff is the max across all compared fields
-                max_diff = max(
-                    d["diff_pct"] for d in comp["diffs"].values()
-                )
-                comp["max_diff_pct"] = round(max_diff, 2)
-                comparisons.append(comp)
-            else:
-                skipped += 1
+    od_vals = pairs[[f"{f}_od" for f in COMPARE_FIELDS]].to_numpy(dtype=float)
+    pa_vals = pairs[[f"{f}_pa" for f in COMPARE_FIELDS]].to_numpy(dtype=float)
+    # Symmetric percentage difference per field; fields that are 0 on both sides are skipped
+    compared = (od_vals != 0) | (pa_vals != 0)
+    denom = np.maximum(np.abs(od_vals), np.abs(pa_vals))
+    diffs = np.divide(
+        np.abs(od_vals - pa_vals), denom, out=np.zeros_like(denom), where=denom != 0
+    ) * 100
+    # Python's round(), not NumPy's half-to-even, so reported diffs are unchanged
+    diffs = np.array([round(d, 2) for d in diffs.ravel().tolist()]).reshape(diffs.shape)
+
+    matched = (pairs["found_od"].notna() & pairs["found_pa"].notna()).to_numpy()
+    keep = matched & compared.any(axis=1)
+    skipped = int(len(pairs) - keep.sum())
+    pairs, od_vals, pa_vals, compared, diffs = (
+        pairs[keep], od_vals[keep], pa_vals[keep], compared[keep], diffs[keep]
+    )
+    # Overall diff is the max across all compared fields
+    max_diffs = np.where(compared, diffs, -np.inf).max(axis=1, initial=-np.inf)
 
     # Categorize
-    all_diffs = [c["max_diff_pct"] for c in comparisons]
-    exact = sum(1 for d in all_diffs if d < 1)
-    close = sum(1 for d in all_diffs if 1 <= d < 10)
-    far = sum(1 for d in all_diffs if d >= 10)
+    categories = pd.cut(max_diffs, [-np.inf, 1, 10, np.inf], right=False, labels=False)
+    exact, close, far = (int((categories == c).sum()) for c in range(3))
 
     # Summary stats
-    if all_diffs:
-        sorted_diffs = sorted(all_diffs)
+    if len(max_diffs):
+        sorted_diffs = np.sort(max_diffs)
         p50_idx = len(sorted_diffs) // 2
         p95_idx = min(int(len(sorted_diffs) * 0.95), len(sorted_diffs) - 1)
         diff_stats = {
-            "median_pct": round(sorted_diffs[p50_idx], 2),
-            "p95_pct": round(sorted_diffs[p95_idx], 2),
-            "max_pct": round(sorted_diffs[-1], 2),
+            "median_pct": round(float(sorted_diffs[p50_idx]), 2),
+            "p95_pct": round(float(sorted_diffs[p95_idx]), 2),
+            "max_pct": round(float(sorted_diffs[-1]), 2),
         }
     else:
         diff_stats = {}
 
     # Top outliers (for debugging)
-    outliers = sorted(comparisons, key=lambda c: c["max_diff_pct"], reverse=True)[:10]
-    outlier_summary = [
-        {
-            "key": o["key"],
-            "variant": o["variant"],
-            "max_diff_pct": o["max_diff_pct"],
-            "diffs": o["diffs"],
-        }
-        for o in outliers
-        if o["max_diff_pct"] >= 1
-    ]
+    outlier_summary = []
+    for i in np.argsort(-max_diffs, kind="stable")[:10]:
+        if max_diffs[i] < 1:
+            continue
+        pair = pairs.iloc[i]
+        outlier_summary.append(
+            {
+                "key": f"{pair['experiment']}__{pair['metric']}",
+                "variant": pair["variant"],
+                "max_diff_pct": round(float(max_diffs[i]), 2),
+                "diffs": {
+                    field: {
+                        "ondemand": round(float(od_vals[i, k]), 4),
+                        "preagg": round(float(pa_vals[i, k]), 4),
+                        "diff_pct": float(diffs[i, k]),
+                    }
+                    for k, field in enumerate(COMPARE_FIELDS)
+                    if compared[i, k]
+                },
+            }
+        )
 
     return {
-        "total_comparisons": len(comparisons),
+        "total_comparisons": len(max_diffs),
         "exact_lt_1pct": exact,
         "close_1_to_10pct": close,
         "far_gt_10pct": far,
@@ -355,6 +579,34 @@ def validate_results(results: list) -> dict:
     }
 
 
+def _to_json(obj) -> bytes:
+    """Serialize ``obj`` as indented JSON (orjson when installed, same output)."""
+    if orjson is not None:
+        # Datetimes go through default=str too, matching the json module's output
+        options = (
+            orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+        return orjson.dumps(obj, default=str, option=options)
+    return json.dumps(obj, indent=2, default=str).encode()
+
+
+def _stream_json(f, meta: dict, results: list):
+    """Write ``{**meta, "queries": results}`` to binary file ``f``, one query at a time.
+
+    The output matches serializing the whole dict with indent=2, but only
+    one query's JSON is held in memory at once.
+    """
+    f.write(b"{\n")
+    for key, value in meta.items():
+        value_json = _to_json(value).replace(b"\n", b"\n  ")
+        f.write(b"  " + _to_json(key) + b": " + value_json + b",\n")
+    f.write(b'  "queries": [')
+    for k, result in enumerate(results):
+        f.write(b",\n    " if k else b"\n    ")
+        f.write(_to_json(result).replace(b"\n", b"\n    "))
+    f.write(b"\n  ]\n}" if results else b"]\n}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run experimentation benchmark")
     parser.add_argument(
@@ -394,6 +646,17 @@ def main():
     )
     parser.add_argument("--warmup", type=int, default=1, help="Warmup runs")
     parser.add_argument("--runs", type=int, default=3, help="Timed runs")
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=1,
+        help="Number of queries to run concurrently, each on its own session",
+    )
+    parser.add_argument(
+        "--force-preagg",
+        action="store_true",
+        help="Rebuild pre-agg tables even if the script and source data are unchanged",
+    )
     args = parser.parse_args()
 
     config = load_config(args.config)
@@ -401,8 +664,12 @@ def main():
 
     # Load query manifest
     manifest_path = os.path.join(args.queries, "manifest.json")
-    with open(manifest_path) as f:
-        manifest = json.load(f)
+    if orjson is not None:
+        with open(manifest_path, "rb") as f:
+            manifest = orjson.loads(f.read())
+    else:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
 
     # Filter
     if args.experiments:
@@ -414,10 +681,14 @@ def main():
     if args.approach != "both":
         manifest = [m for m in manifest if m["approach"] == args.approach]
 
+    # Every query's SQL is read up front, once
+    sql_cache = load_query_sql(args.queries, manifest)
+
     print(f"Benchmark: {len(manifest)} queries to execute")
     print(f"  Engine: {engine_name}")
     print(f"  Warmup runs: {args.warmup}")
     print(f"  Timed runs: {args.runs}")
+    print(f"  Parallelism: {args.parallelism}")
 
     # Connect to database
     engine = create_engine(engine_name, config)
@@ -426,15 +697,33 @@ def main():
 
     # Run pre-agg pipeline (if needed)
     pipeline_timings = {}
+    pipeline_cached = False
     if args.approach in ("preagg", "both"):
-        pipeline_timings = run_preagg_pipeline(engine, args.schemas, engine_name)
+        # Rebuilds are skipped while the script, the loaded raw data and the
+        # connection match this engine's last successful build
+        state_path = os.path.join(
+            CONFIG_CACHE_DIR, PREAGG_STATE_FILE.format(engine=engine_name)
+        )
+        signature = None
+        if not args.force_preagg:
+            csv_dir = config.get("data", {}).get(
+                "output_dir", "/tmp/experimentation-benchmark/csv"
+            )
+            signature = _preagg_signature(
+                args.schemas, engine_name, config[engine_name], csv_dir
+            )
+        pipeline_timings, pipeline_cached = run_preagg_pipeline(
+            engine, args.schemas, engine_name, state_path, signature, args.force_preagg
+        )
 
     # Run queries
     print(f"\n=== Running {len(manifest)} Queries ===")
-    results = run_queries(engine, args.queries, manifest, args.warmup, args.runs)
+    results = run_queries(
+        engine, sql_cache, manifest, args.warmup, args.runs, args.parallelism
+    )
 
     # Compute summary
-    summary = compute_summary(results, pipeline_timings)
+    summary = compute_summary(results, pipeline_timings, args.parallelism)
 
     # Validate if requested
     validation = {}
@@ -459,24 +748,25 @@ def main():
             for o in validation["top_outliers"][:5]:
                 print(f"    {o['key']} ({o['variant']}): {o['max_diff_pct']}%")
 
-    # Build output
+    # Build output (queries are appended while streaming the file)
     output = {
         "engine": engine_name,
         "timestamp": datetime.now().isoformat(),
         "config": {
             "warmup_runs": args.warmup,
             "timed_runs": args.runs,
+            "parallelism": args.parallelism,
         },
         "pipeline_timings": pipeline_timings,
+        "pipeline_cached": pipeline_cached,
         "summary": summary,
         "validation": validation,
-        "queries": results,
     }
 
     # Write output
     Path(os.path.dirname(args.output)).mkdir(parents=True, exist_ok=True)
-    with open(args.output, "w") as f:
-        json.dump(output, f, indent=2, default=str)
+    with open(args.output, "wb") as f:
+        _stream_json(f, output, results)
 
     print(f"\n=== Summary ===")
     for k, v in summary.items():
@@ -4,22 +4,33 @@ Standalone synthetic data generator for experimentation benchmarking.
 Generates 5 CSV files simulating an e-commerce platform with A/B tests.
 
 Usage:
-    python generate_data.py [--users 5000] [--days 120] [--output /tmp/experimentation-benchmark/csv]
+    python generate_data.py [--users 5000] [--days 120] [--output /tmp/experimentation-benchmark/csv] [--workers N]
 """
 
 import argparse
-import csv
+import collections
+import contextlib
 import os
-import random
-import uuid
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa  # optional: pip install -e .[speedups]
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
 
 # Distributions
 BROWSERS = [("Chrome", 0.65), ("Safari", 0.20), ("Firefox", 0.15)]
 COUNTRIES = [("US", 0.50), ("UK", 0.20), ("CA", 0.15), ("AU", 0.15)]
 EVENTS = ["Add to Cart", "Cart Loaded", "Wishlist", "Search"]
+PATHS = ["/", "/products", "/cart", "/checkout", "/about"]
+QUANTITIES = [(1, 50), (2, 25), (3, 15), (4, 7), (5, 3)]
+AMOUNTS = [(1, 10), (2, 15), (5, 25), (10, 20), (20, 15), (50, 10), (100, 5)]
 
 # Experiment config
 EXPERIMENT_ID = "checkout-layout"
@@ -27,172 +38,282 @@ VARIATIONS = ["0", "1", "2"]
 VARIATION_WEIGHTS = [0.34, 0.33, 0.33]
 
 # Simulation baseline date
-BASE_DATE = datetime(2021, 10, 1)
+BASE_DATE = np.datetime64("2021-10-01T00:00:00", "s")
+
+# Users simulated (and held in memory) at a time
+USERS_PER_BLOCK = 1000
+
+COMMON_FIELDS = ["user_id", "anonymous_id", "session_id", "browser", "country"]
 
+# Output files, in write order: table -> (filename, columns)
+CSV_FILES = {
+    "exposures": ("exposures.csv", COMMON_FIELDS + ["timestamp", "experiment_id", "variation_id"]),
+    "orders": ("orders.csv", COMMON_FIELDS + ["timestamp", "qty", "amount"]),
+    "events": ("events.csv", COMMON_FIELDS + ["timestamp", "event", "value"]),
+    "pages": ("pages.csv", COMMON_FIELDS + ["timestamp", "path"]),
+    "sessions": ("sessions.csv", COMMON_FIELDS + ["sessionStart", "pages", "duration"]),
+}
 
-def weighted_choice(options):
-    """Pick from [(value, weight), ...] list."""
+
+def make_cdf(options):
+    """Turn a [(value, weight), ...] list into (values, cumulative probabilities)."""
     values, weights = zip(*options)
-    return random.choices(values, weights=weights, k=1)[0]
+    p = np.asarray(weights, dtype=float)
+    cdf = (p / p.sum()).cumsum()
+    cdf /= cdf[-1]
+    return np.asarray(values), cdf
 
 
-def generate_user_id(index):
-    """Generate a short deterministic user ID."""
-    return f"u{index:06d}"
+# Fixed distributions as precomputed CDFs, so draws are one searchsorted
+BROWSER_CDF = make_cdf(BROWSERS)
+COUNTRY_CDF = make_cdf(COUNTRIES)
+VARIATION_CDF = make_cdf(list(zip(VARIATIONS, VARIATION_WEIGHTS)))
+QUANTITY_CDF = make_cdf(QUANTITIES)
+AMOUNT_CDF = make_cdf(AMOUNTS)
 
 
-def generate_anonymous_id():
-    """Generate a random anonymous ID."""
-    return uuid.uuid4().hex[:16]
+def weighted_choice(rng, dist, size):
+    """Draw ``size`` values from a make_cdf() distribution."""
+    values, cdf = dist
+    return values[cdf.searchsorted(rng.random(size), side="right")]
 
 
-def random_timestamp(day_offset, base_date=BASE_DATE):
-    """Generate a random timestamp on a given day."""
-    day = base_date + timedelta(days=day_offset)
-    seconds = random.randint(0, 86399)
-    return day + timedelta(seconds=seconds)
+def generate_user_ids(start, stop):
+    """Generate short deterministic user IDs for user indexes [start, stop)."""
+    return np.array([f"u{i:06d}" for i in range(start, stop)])
 
 
-class User:
-    def __init__(self, index, run_length_days):
-        self.user_id = generate_user_id(index)
-        self.anonymous_id = generate_anonymous_id()
-        self.browser = weighted_choice(BROWSERS)
-        self.country = weighted_choice(COUNTRIES)
-        self.run_length_days = run_length_days
+def generate_anonymous_ids(rng, n_users):
+    """Generate random 16-hex-digit anonymous IDs."""
+    hex_ids = rng.bytes(8 * n_users).hex()
+    return np.array([hex_ids[i * 16 : (i + 1) * 16] for i in range(n_users)])
 
-        # User starts visiting on a random day in the first 2/3 of the run
-        self.first_day = int((index / 5000) * (run_length_days - 30))
-        self.first_day = max(0, min(self.first_day, run_length_days - 10))
 
-        # Assign variation (deterministic based on user_id hash)
-        self.variation = random.choices(
-            VARIATIONS, weights=VARIATION_WEIGHTS, k=1
-        )[0]
+def to_timestamps(seconds):
+    """Convert integer second offsets from BASE_DATE to datetime64[s].
 
-        # Activity level: sessions per day (0.1 to 2.0)
-        self.activity_rate = random.uniform(0.1, 2.0)
+    Timestamps stay binary until the CSV writer formats them in C; no
+    per-row datetime objects or ISO strings are built in Python.
+    """
+    return BASE_DATE + seconds.astype("timedelta64[s]")
 
-        # Purchase probability per session (0.01 to 0.15)
-        self.purchase_rate = random.uniform(0.01, 0.15)
 
+def as_column(values):
+    """Prepare values for take(): an Arrow array when pyarrow is installed."""
+    return pa.array(values) if pa is not None else np.asarray(values)
+
+
+def take(column, indices):
+    """Gather ``column[indices]``, staying in Arrow for Arrow columns."""
+    if pa is not None:
+        return column.take(indices)
+    return column[indices]
+
+
+def generate_users(rng, start, stop, run_length_days):
+    """Draw attributes for user indexes [start, stop) as arrays of shape (n_users,)."""
+    n_users = stop - start
+    index = np.arange(start, stop)
+
+    # Users start visiting on a day spread across the first 2/3 of the run
+    first_day = ((index / 5000) * (run_length_days - 30)).astype(np.int64)
+    first_day = np.maximum(0, np.minimum(first_day, run_length_days - 10))
+
+    return {
+        "user_id": generate_user_ids(start, stop),
+        "anonymous_id": generate_anonymous_ids(rng, n_users),
+        "browser": weighted_choice(rng, BROWSER_CDF, n_users),
+        "country": weighted_choice(rng, COUNTRY_CDF, n_users),
+        "first_day": first_day,
+        "variation": weighted_choice(rng, VARIATION_CDF, n_users),
+        # Activity level: sessions per day (0.1 to 2.0)
+        "activity_rate": rng.uniform(0.1, 2.0, n_users),
+        # Purchase probability per session (0.01 to 0.15)
+        "purchase_rate": rng.uniform(0.01, 0.15, n_users),
         # Event probability per session
-        self.event_rate = random.uniform(0.2, 0.8)
-
-
-def simulate_user(user, tables):
-    """Simulate all activity for one user."""
-    exposed = False
-    session_count = 0
-
-    for day in range(user.first_day, user.run_length_days):
-        # Number of sessions this day (Poisson-ish)
-        num_sessions = max(0, int(random.gauss(user.activity_rate, 0.5)))
-
-        for _ in range(num_sessions):
-            session_count += 1
-            session_id = f"{user.user_id}_s{session_count}"
-            ts = random_timestamp(day)
-
-            common = {
-                "user_id": user.user_id,
-                "anonymous_id": user.anonymous_id,
-                "session_id": session_id,
-                "browser": user.browser,
-                "country": user.country,
-            }
-
-            # Page view
-            pages_in_session = random.randint(1, 5)
-            for p in range(pages_in_session):
-                page_ts = ts + timedelta(seconds=p * random.randint(10, 120))
-                path = random.choice(
-                    ["/", "/products", "/cart", "/checkout", "/about"]
-                )
-                tables["pages"].append(
-                    {**common, "timestamp": page_ts.isoformat(), "path": path}
-                )
-
-            # Session record
-            duration = random.randint(30, 600)
-            tables["sessions"].append(
-                {
-                    **common,
-                    "sessionStart": ts.isoformat(),
-                    "pages": pages_in_session,
-                    "duration": duration,
-                }
-            )
-
-            # Experiment exposure (first time or re-exposure)
-            if not exposed and day >= user.first_day + 5:
-                exposed = True
-                tables["exposures"].append(
-                    {
-                        **common,
-                        "timestamp": ts.isoformat(),
-                        "experiment_id": EXPERIMENT_ID,
-                        "variation_id": user.variation,
-                    }
-                )
-            elif exposed and random.random() < 0.05:
-                # Small chance of re-exposure
-                tables["exposures"].append(
-                    {
-                        **common,
-                        "timestamp": ts.isoformat(),
-                        "experiment_id": EXPERIMENT_ID,
-                        "variation_id": user.variation,
-                    }
-                )
-
-            # Events
-            if random.random() < user.event_rate:
-                event_name = random.choice(EVENTS)
-                event_ts = ts + timedelta(seconds=random.randint(5, 300))
-                tables["events"].append(
-                    {
-                        **common,
-                        "timestamp": event_ts.isoformat(),
-                        "event": event_name,
-                        "value": random.randint(1, 10),
-                    }
-                )
-
-            # Orders
-            if random.random() < user.purchase_rate:
-                order_ts = ts + timedelta(seconds=random.randint(60, 600))
-                qty = random.choices(
-                    [1, 2, 3, 4, 5], weights=[50, 25, 15, 7, 3], k=1
-                )[0]
-                # amount can be NULL sometimes
-                if random.random() < 0.9:
-                    amount = random.choices(
-                        [1, 2, 5, 10, 20, 50, 100],
-                        weights=[10, 15, 25, 20, 15, 10, 5],
-                        k=1,
-                    )[0]
-                else:
-                    amount = None  # ~10% NULL amounts
-
-                tables["orders"].append(
-                    {
-                        **common,
-                        "timestamp": order_ts.isoformat(),
-                        "qty": qty,
-                        "amount": amount,
-                    }
-                )
-
-
-def write_csv(rows, output_dir, filename, fieldnames):
-    """Write rows to a CSV file."""
-    filepath = os.path.join(output_dir, filename)
-    with open(filepath, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    print(f"  Wrote {len(rows):,} rows to {filepath}")
+        "event_rate": rng.uniform(0.2, 0.8, n_users),
+    }
+
+
+def simulate_users(rng, users, run_length_days):
+    """Simulate all activity for all users at once.
+
+    Returns ``{table: {column: array}}``, one equal-length array per column.
+    """
+    n_users = len(users["user_id"])
+    days = np.arange(run_length_days)
+
+    # Sessions per user per day (Gaussian around the activity rate, floored at 0)
+    counts = rng.normal(users["activity_rate"][:, None], 0.5, (n_users, run_length_days))
+    counts = np.maximum(0, counts.astype(np.int64))
+    counts[days[None, :] < users["first_day"][:, None]] = 0
+
+    # One entry per session, ordered by user then day
+    flat_counts = counts.ravel()
+    s_user = np.repeat(np.repeat(np.arange(n_users), run_length_days), flat_counts)
+    s_day = np.repeat(np.tile(days, n_users), flat_counts)
+    n_sessions = len(s_user)
+    per_user = counts.sum(axis=1)
+    s_number = np.arange(n_sessions) - np.repeat(np.cumsum(per_user) - per_user, per_user) + 1
+    s_id = np.char.add(np.char.add(users["user_id"][s_user], "_s"), s_number.astype(str))
+    s_ts = s_day * 86400 + rng.integers(0, 86400, n_sessions)
+
+    # Every row repeats its user's and session's identity columns. They are
+    # converted once per block and gathered by index for each table, rather
+    # than rebuilt (and, with pyarrow, re-encoded) per row.
+    user_columns = {
+        name: as_column(users[name])
+        for name in ("user_id", "anonymous_id", "browser", "country", "variation")
+    }
+    session_ids = as_column(s_id)
+
+    def common(sessions):
+        u = s_user[sessions]
+        return {
+            "user_id": take(user_columns["user_id"], u),
+            "anonymous_id": take(user_columns["anonymous_id"], u),
+            "session_id": take(session_ids, sessions),
+            "browser": take(user_columns["browser"], u),
+            "country": take(user_columns["country"], u),
+        }
+
+    # Page views: 1-5 per session, spaced by a random 10-120s step
+    pages_in_session = rng.integers(1, 6, n_sessions)
+    p_session = np.repeat(np.arange(n_sessions), pages_in_session)
+    p_index = np.arange(len(p_session)) - np.repeat(
+        np.cumsum(pages_in_session) - pages_in_session, pages_in_session
+    )
+    p_ts = s_ts[p_session] + p_index * rng.integers(10, 121, len(p_session))
+    pages = {
+        **common(p_session),
+        "timestamp": to_timestamps(p_ts),
+        "path": take(as_column(PATHS), rng.integers(0, len(PATHS), len(p_session))),
+    }
+
+    all_sessions = np.arange(n_sessions)
+    sessions = {
+        **common(all_sessions),
+        "sessionStart": to_timestamps(s_ts),
+        "pages": pages_in_session,
+        "duration": rng.integers(30, 601, n_sessions),
+    }
+
+    # Exposure on the first session from day first_day + 5, then a small
+    # chance of re-exposure on every later session
+    eligible = np.flatnonzero(s_day >= users["first_day"][s_user] + 5)
+    e_user = s_user[eligible]
+    first = np.ones(len(eligible), dtype=bool)
+    first[1:] = e_user[1:] != e_user[:-1]
+    exposed = eligible[first | (rng.random(len(eligible)) < 0.05)]
+    exposures = {
+        **common(exposed),
+        "timestamp": to_timestamps(s_ts[exposed]),
+        "experiment_id": take(as_column([EXPERIMENT_ID]), np.zeros(len(exposed), np.int64)),
+        "variation_id": take(user_columns["variation"], s_user[exposed]),
+    }
+
+    # Events
+    ev = np.flatnonzero(rng.random(n_sessions) < users["event_rate"][s_user])
+    events = {
+        **common(ev),
+        "timestamp": to_timestamps(s_ts[ev] + rng.integers(5, 301, len(ev))),
+        "event": take(as_column(EVENTS), rng.integers(0, len(EVENTS), len(ev))),
+        "value": rng.integers(1, 11, len(ev)),
+    }
+
+    # Orders; ~10% have a NULL amount
+    od = np.flatnonzero(rng.random(n_sessions) < users["purchase_rate"][s_user])
+    amount = pd.array(weighted_choice(rng, AMOUNT_CDF, len(od)), dtype="Int64")
+    amount[rng.random(len(od)) >= 0.9] = pd.NA
+    orders = {
+        **common(od),
+        "timestamp": to_timestamps(s_ts[od] + rng.integers(60, 601, len(od))),
+        "qty": weighted_choice(rng, QUANTITY_CDF, len(od)),
+        "amount": amount,
+    }
+
+    return {
+        "pages": pages,
+        "sessions": sessions,
+        "exposures": exposures,
+        "events": events,
+        "orders": orders,
+    }
+
+
+def encode_csv(columns, fieldnames, header):
+    """Render a block's columns as CSV bytes (via pyarrow's writer when installed).
+
+    Both writers produce the same bytes: fields are quoted only when they
+    contain a delimiter, quote or newline. pyarrow quotes every string (and
+    the header) under its "needed" style, so it writes unquoted and a block
+    with a value that needs quoting falls back to pandas.
+    """
+    data = {name: columns[name] for name in fieldnames}
+    if pa is not None:
+        buf = pa.BufferOutputStream()
+        options = pa_csv.WriteOptions(include_header=False, quoting_style="none")
+        try:
+            pa_csv.write_csv(pa.table(data), buf, options)
+        except pa.ArrowInvalid:
+            pass
+        else:
+            head = (",".join(fieldnames) + "\n").encode() if header else b""
+            return head + buf.getvalue().to_pybytes()
+    return pd.DataFrame(data).to_csv(index=False, header=header).encode()
+
+
+def generate_block(task):
+    """Simulate one block of users; returns {table: (csv bytes, row count)}.
+
+    Runs in a worker process; only the encoded CSV goes back to the parent.
+    """
+    start, stop, run_length_days, seed = task
+    rng = np.random.default_rng(seed)
+    users = generate_users(rng, start, stop, run_length_days)
+    tables = simulate_users(rng, users, run_length_days)
+    return {
+        table: (
+            # The first block carries each file's header row
+            encode_csv(tables[table], fieldnames, header=start == 0),
+            len(tables[table]["session_id"]),
+        )
+        for table, (_, fieldnames) in CSV_FILES.items()
+    }
+
+
+def iter_blocks(tasks, workers):
+    """Yield generate_block() results in task order, using ``workers`` processes."""
+    if workers <= 1:
+        for task in tasks:
+            yield generate_block(task)
+        return
+
+    # Keep a bounded number of blocks in flight so memory doesn't grow with --users
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        pending = collections.deque()
+        for task in tasks:
+            pending.append(ex.submit(generate_block, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class CsvTableWriter:
+    """Appends encoded CSV blocks to one file, counting rows."""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.rows = 0
+        self._file = open(filepath, "wb")
+
+    def write(self, data, rows):
+        self._file.write(data)
+        self.rows += rows
+
+    def close(self):
+        self._file.close()
 
 
 def main():
@@ -214,114 +335,54 @@ def main():
     parser.add_argument(
         "--seed", type=int, default=42, help="Random seed (default: 42)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes simulating user blocks in parallel (default: CPU count)",
+    )
     args = parser.parse_args()
 
-    random.seed(args.seed)
+    # One independent generator per user block, spawned from the seed, so a
+    # block's data depends only on (seed, block index) and not on which
+    # blocks were drawn before it
+    starts = range(0, args.users, USERS_PER_BLOCK)
+    block_seeds = np.random.SeedSequence(args.seed).spawn(len(starts))
 
     Path(args.output).mkdir(parents=True, exist_ok=True)
 
-    tables = {
-        "pages": [],
-        "sessions": [],
-        "exposures": [],
-        "events": [],
-        "orders": [],
-    }
-
     print(f"Generating data for {args.users:,} users over {args.days} days...")
-    for i in range(args.users):
-        user = User(i, args.days)
-        simulate_user(user, tables)
-        if (i + 1) % 1000 == 0:
-            print(f"  Processed {i + 1:,} users...")
-
-    print(f"\nWriting CSV files to {args.output}/")
-
-    write_csv(
-        tables["exposures"],
-        args.output,
-        "exposures.csv",
-        [
-            "user_id",
-            "anonymous_id",
-            "session_id",
-            "browser",
-            "country",
-            "timestamp",
-            "experiment_id",
-            "variation_id",
-        ],
-    )
-
-    write_csv(
-        tables["orders"],
-        args.output,
-        "orders.csv",
-        [
-            "user_id",
-            "anonymous_id",
-            "session_id",
-            "browser",
-            "country",
-            "timestamp",
-            "qty",
-            "amount",
-        ],
-    )
-
-    write_csv(
-        tables["events"],
-        args.output,
-        "events.csv",
-        [
-            "user_id",
-            "anonymous_id",
-            "session_id",
-            "browser",
-            "country",
-            "timestamp",
-            "event",
-            "value",
-        ],
-    )
-
-    write_csv(
-        tables["pages"],
-        args.output,
-        "pages.csv",
-        [
-            "user_id",
-            "anonymous_id",
-            "session_id",
-            "browser",
-            "country",
-            "timestamp",
-            "path",
-        ],
-    )
-
-    write_csv(
-        tables["sessions"],
-        args.output,
-        "sessions.csv",
-        [
-            "user_id",
-            "anonymous_id",
-            "session_id",
-            "browser",
-            "country",
-            "sessionStart",
-            "pages",
-            "duration",
-        ],
-    )
+    print(f"Writing CSV files to {args.output}/")
+
+    # Rows are streamed out block by block, so memory stays bounded by
+    # USERS_PER_BLOCK rather than growing with --users. Blocks may be
+    # simulated in parallel but are written in order, so the output doesn't
+    # depend on --workers.
+    tasks = [
+        (start, min(start + USERS_PER_BLOCK, args.users), args.days, seed)
+        for start, seed in zip(starts, block_seeds)
+    ]
+    with contextlib.ExitStack() as stack:
+        writers = {}
+        for table, (filename, _) in CSV_FILES.items():
+            writer = CsvTableWriter(os.path.join(args.output, filename))
+            writers[table] = stack.enter_context(contextlib.closing(writer))
+
+        for (_, stop, _, _), block in zip(tasks, iter_blocks(tasks, args.workers)):
+            for table, (data, rows) in block.items():
+                writers[table].write(data, rows)
+            print(f"  Processed {stop:,} users...")
+
+    print()
+    for writer in writers.values():
+        print(f"  Wrote {writer.rows:,} rows to {writer.filepath}")
 
     print("\nData generation complete!")
-    print(f"  Exposures: {len(tables['exposures']):,}")
-    print(f"  Orders:    {len(tables['orders']):,}")
-    print(f"  Events:    {len(tables['events']):,}")
-    print(f"  Pages:     {len(tables['pages']):,}")
-    print(f"  Sessions:  {len(tables['sessions']):,}")
+    print(f"  Exposures: {writers['exposures'].rows:,}")
+    print(f"  Orders:    {writers['orders'].rows:,}")
+    print(f"  Events:    {writers['events'].rows:,}")
+    print(f"  Pages:     {writers['pages'].rows:,}")
+    print(f"  Sessions:  {writers['sessions'].rows:,}")
 
 
 if __name__ == "__main__":
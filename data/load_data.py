@@ -3,23 +3,122 @@
 Load generated CSV data into the target database and optionally build pre-agg tables.
 
 Usage:
-    python -m data.load_data [--config config.yaml] [--csv-dir /tmp/.../csv] [--preagg]
+    python -m data.load_data [--config config.yaml] [--csv-dir /tmp/.../csv] [--preagg] [--to-parquet]
 
 Supports both DuckDB (default) and Postgres engines.
 """
 
 import argparse
+import collections
+import contextlib
+import hashlib
+import json
+import mmap
 import os
+import re
+import struct
 import subprocess
 import sys
+import tempfile
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
+import numpy as np
+import pandas as pd
 import yaml
 
+try:
+    import psycopg
+except ImportError:  # optional: pip install -e .[psycopg3]; falls back to psql
+    psycopg = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: pip install -e .[speedups]
+    pa = None
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml-backed, much faster
+except ImportError:
+    from yaml import SafeLoader
+
+from benchmark.engines.statements import iter_statements
+
+# CSV files produced by data/generate_data.py, one per raw table
+EXPECTED_FILES = [
+    "exposures.csv",
+    "orders.csv",
+    "events.csv",
+    "pages.csv",
+    "sessions.csv",
+]
+
+# Bytes sent per COPY write when streaming a CSV into Postgres
+COPY_CHUNK_BYTES = 1 << 20
+
+# Seconds between "still running" lines while a load step is in progress
+PROGRESS_INTERVAL = 5
+
+# Written next to the DuckDB file: hashes of the inputs of the last raw load
+LOAD_STATE_SUFFIX = ".loaded.json"
+
+# Rows read from a CSV and encoded per binary COPY write
+BINARY_CHUNK_ROWS = 65536
+
+# Binary COPY file header (signature, flags, header extension length) and trailer
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack("!h", -1)
+
+# Microseconds from the Unix epoch to the Postgres epoch (2000-01-01)
+_PG_EPOCH_US = 946_684_800 * 1_000_000
+
+# Binary wire format for each CREATE TABLE type name the encoder handles
+_BINARY_TYPES = {
+    "VARCHAR": "text",
+    "TEXT": "text",
+    "INT": "int4",
+    "INTEGER": "int4",
+    "BIGINT": "int8",
+    "DOUBLE": "float8",
+    "TIMESTAMP": "timestamp",
+}
+_FIXED_WIDTH = {"int4": ">i4", "int8": ">i8", "float8": ">f8", "timestamp": ">i8"}
+
+_CREATE_TABLE_RE = re.compile(
+    r"CREATE\s+(?:UNLOGGED\s+)?TABLE\s+(\w+)\s*\((.*)\)", re.I | re.S
+)
+
+# CSV load in the DuckDB raw-table script: COPY <table> FROM '<path>.csv' (<options>)
+_DUCKDB_COPY_CSV_RE = re.compile(
+    r"^(\s*COPY\s+(\w+)\s+FROM\s+)'([^']*)\.csv'\s*(\([^)]*\))", re.I | re.M
+)
+
+# psql meta-command in raw_tables.sql: \copy <table> FROM '<path>' <options>
+_PSQL_COPY_RE = re.compile(r"^\s*\\copy\s+(\w+)\s+FROM\s+'([^']*)'\s*(.*)$", re.I | re.M | re.S)
+
 
 def load_config(config_path: str) -> dict:
     with open(config_path) as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=SafeLoader)
+
+
+@contextlib.contextmanager
+def _still_running(start: float):
+    """Print the elapsed time every PROGRESS_INTERVAL seconds until the block exits."""
+    done = threading.Event()
+
+    def report():
+        while not done.wait(PROGRESS_INTERVAL):
+            print(f"  ... {time.time() - start:.0f}s", flush=True)
+
+    thread = threading.Thread(target=report, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
 
 
 def run_psql(config: dict, sql_file: str, description: str):
@@ -40,54 +139,516 @@ def run_psql(config: dict, sql_file: str, description: str):
 
     print(f"\n{description}...")
     start = time.time()
-    result = subprocess.run(cmd, env=env, capture_output=True, text=True)
-    elapsed = time.time() - start
+    # Only the last few lines of output are shown, so stream it through a
+    # bounded buffer; stderr goes to a temp file so neither pipe can fill up
+    tail = collections.deque(maxlen=5)
+    with tempfile.TemporaryFile("w+") as stderr:
+        with _still_running(start), subprocess.Popen(
+            cmd, env=env, stdout=subprocess.PIPE, stderr=stderr, text=True
+        ) as proc:
+            for line in proc.stdout:
+                if line.strip():
+                    tail.append(line.rstrip("\n"))
+        elapsed = time.time() - start
+
+        if proc.returncode != 0:
+            stderr.seek(0)
+            print(f"  ERROR: {stderr.read()}")
+            sys.exit(1)
 
-    if result.returncode != 0:
-        print(f"  ERROR: {result.stderr}")
-        sys.exit(1)
+    print(f"  Done in {elapsed:.2f}s")
+    for line in tail:
+        print(f"    {line}")
+
+
+def _advise(f, advice: str):
+    """posix_fadvise the whole of open file ``f``, where the platform supports it."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(f.fileno(), 0, 0, getattr(os, advice))
+
+
+def parse_column_types(sql_file: str) -> dict:
+    """Map each table created in ``sql_file`` to its binary COPY column types.
+
+    Tables with a column the binary encoder can't handle map to None.
+    """
+    tables = {}
+    for stmt in iter_statements(sql_file):
+        m = _CREATE_TABLE_RE.search(stmt)
+        if m is None:
+            continue
+        types = []
+        for column in m.group(2).split(","):
+            words = column.split()
+            type_name = words[1].split("(")[0].upper() if len(words) > 1 else ""
+            types.append(_BINARY_TYPES.get(type_name))
+        tables[m.group(1)] = None if None in types else types
+    return tables
+
+
+def _text_payload(values: pd.Series):
+    """UTF-8 bytes of a string column as a padded (rows x bytes) matrix, plus lengths."""
+    if pa is not None:
+        # Gather straight from the Arrow string buffers (zero-copy for
+        # pandas' Arrow-backed strings), skipping any per-value encoding
+        arr = pa.array(values, type=pa.large_string())
+        if isinstance(arr, pa.ChunkedArray):
+            arr = arr.combine_chunks()
+        _, offsets, data = arr.buffers()
+        offsets = np.frombuffer(offsets, np.int64)[arr.offset : arr.offset + len(arr) + 1]
+        data = np.frombuffer(data, np.uint8) if data is not None else np.zeros(1, np.uint8)
+        size = np.diff(offsets)
+        width = np.arange(size.max(initial=0))
+        # Bytes past each value's length are padding, masked out later
+        index = np.minimum(offsets[:-1, None] + width, len(data) - 1)
+        return data[index], size
+
+    text = values.fillna("").to_numpy(dtype=str)
+    try:
+        payload = text.astype("S")  # ASCII-only: a plain C cast
+    except UnicodeEncodeError:
+        payload = np.char.encode(text, "utf-8")
+    size = np.char.str_len(payload).astype(np.int64)
+    return payload.view(np.uint8).reshape(len(values), -1), size
+
+
+def _binary_fields(values: pd.Series, pg_type: str):
+    """Encode one column's fields as a (rows x bytes) matrix plus each row's used width."""
+    n = len(values)
+    null = values.isna().to_numpy()
+    if pg_type == "text":
+        payload, size = _text_payload(values)
     else:
-        print(f"  Done in {elapsed:.2f}s")
-        if result.stdout:
-            # Print last few lines of output
-            lines = result.stdout.strip().split("\n")
-            for line in lines[-5:]:
-                print(f"    {line}")
+        if pg_type == "timestamp":
+            ts = pd.to_datetime(values, format="ISO8601").to_numpy("datetime64[us]")
+            raw = ts.astype(np.int64) - _PG_EPOCH_US
+        else:
+            raw = pd.to_numeric(values.fillna("0"))
+        dtype = np.dtype(_FIXED_WIDTH[pg_type])
+        payload = np.asarray(raw).astype(dtype).view(np.uint8).reshape(n, dtype.itemsize)
+        size = np.full(n, dtype.itemsize, dtype=np.int64)
+
+    size[null] = -1  # a field length of -1 marks NULL
+    header = size.astype(">i4").view(np.uint8).reshape(n, 4)
+    return np.hstack([header, payload]), 4 + np.maximum(size, 0)
+
+
+def encode_binary_rows(frame: pd.DataFrame, types: list) -> bytes:
+    """Encode a block of CSV rows (read as strings) as binary COPY tuples.
+
+    Each column is encoded for the whole block at once into a fixed-width
+    byte matrix; the unused padding is then masked out row by row.
+    """
+    n = len(frame)
+    ncols = np.frombuffer(struct.pack("!h", len(types)), dtype=np.uint8)
+    parts = [np.broadcast_to(ncols, (n, 2))]
+    widths = [np.full(n, 2)]
+    for (_, values), pg_type in zip(frame.items(), types):
+        fields, width = _binary_fields(values, pg_type)
+        parts.append(fields)
+        widths.append(width)
+
+    keep = np.hstack([np.arange(p.shape[1]) < w[:, None] for p, w in zip(parts, widths)])
+    return np.hstack(parts)[keep].tobytes()
+
+
+def iter_binary_copy(csv_path: str, types: list):
+    """Yield a CSV file (empty fields as NULL) in binary COPY format, block by block."""
+    yield _PGCOPY_HEADER
+    for frame in pd.read_csv(
+        csv_path,
+        dtype=str,
+        keep_default_na=False,
+        na_values=[""],
+        chunksize=BINARY_CHUNK_ROWS,
+    ):
+        if len(frame.columns) != len(types):
+            raise ValueError(
+                f"{csv_path} has {len(frame.columns)} columns, expected {len(types)}"
+            )
+        yield encode_binary_rows(frame, types)
+    yield _PGCOPY_TRAILER
+
+
+def pg_copy_csv(conn, table: str, csv_path: str, options: str, types: list = None) -> int:
+    """Stream a CSV file into ``table`` with COPY FROM STDIN; returns rows loaded.
+
+    With ``types`` the rows are converted client-side and sent in binary
+    format, so the server skips text parsing; ``options`` then no longer apply.
+    """
+    with conn.cursor() as cur:
+        if types is not None:
+            with cur.copy(f"COPY {table} FROM STDIN (FORMAT BINARY)") as copy:
+                for block in iter_binary_copy(csv_path, types):
+                    copy.write(block)
+        else:
+            with cur.copy(f"COPY {table} FROM STDIN {options}") as copy:
+                # Map the file and send slices of the page cache directly,
+                # rather than read() each chunk into a fresh bytes object
+                with open(csv_path, "rb") as f:
+                    size = os.fstat(f.fileno()).st_size
+                    if size:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            # Read once front to back: prefetch ahead of the
+                            # writes, then drop the pages from the cache
+                            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                                mm.madvise(mmap.MADV_SEQUENTIAL)
+                            with memoryview(mm) as view:
+                                for offset in range(0, size, COPY_CHUNK_BYTES):
+                                    copy.write(view[offset : offset + COPY_CHUNK_BYTES])
+                        _advise(f, "POSIX_FADV_DONTNEED")
+        return cur.rowcount
+
+
+def pg_connect(config: dict):
+    """Open the autocommit psycopg connection shared by every Postgres script."""
+    pg = config["postgres"]
+    return psycopg.connect(
+        host=pg.get("host", "localhost"),
+        port=pg.get("port", 5432),
+        dbname=pg["database"],
+        user=pg.get("user", "postgres"),
+        password=pg.get("password", ""),
+        autocommit=True,
+    )
+
+
+@contextlib.contextmanager
+def _pg_script(conn, description: str):
+    """Time a script run over ``conn`` and report its last few server notices.
+
+    The notices stand in for the output psql used to print.
+    """
+    print(f"\n{description}...")
+    start = time.time()
+    notices = []
 
+    def on_notice(diag):
+        notices.append(diag.message_primary)
+
+    conn.add_notice_handler(on_notice)
+    try:
+        with _still_running(start):
+            yield
+    except psycopg.Error as e:
+        print(f"  ERROR: {e}")
+        sys.exit(1)
+    finally:
+        conn.remove_notice_handler(on_notice)
 
-def run_duckdb_sql_file(config: dict, sql_file: str, description: str):
-    """Execute a SQL file using DuckDB."""
+    elapsed = time.time() - start
+    print(f"  Done in {elapsed:.2f}s")
+    for line in notices[-5:]:
+        print(f"    {line}")
+
+
+def run_pg_sql(conn, sql_file: str, description: str):
+    """Run a SQL file over ``conn`` as one multi-statement simple query."""
+    with open(sql_file) as f:
+        sql = f.read()
+
+    with _pg_script(conn, description):
+        conn.execute(sql)
+
+
+def run_pg_raw_tables(
+    conn, config: dict, sql_file: str, csv_dir: str, description: str, binary=False
+):
+    """Run the raw-table script over ``conn``.
+
+    Its ``\\copy`` lines are replaced by COPY FROM STDIN of the same file name
+    in ``csv_dir``; everything else runs as ordinary SQL. Consecutive copies
+    run concurrently, each over its own connection, so the server parses
+    several CSVs at once. With ``binary``, tables whose column types allow it
+    are sent in binary COPY format.
+    """
+
+    column_types = parse_column_types(sql_file) if binary else {}
+
+    def copy_one(table, csv_path, options):
+        with pg_connect(config) as copy_conn:
+            return pg_copy_csv(
+                copy_conn, table, csv_path, options, column_types.get(table)
+            )
+
+    pending = []
+
+    def wait_for_copies():
+        for table, future in pending:
+            print(f"    {table}: {future.result():,} rows")
+        pending.clear()
+
+    with _pg_script(conn, description), ThreadPoolExecutor(
+        max_workers=len(EXPECTED_FILES)
+    ) as pool:
+        for stmt in iter_statements(sql_file):
+            m = _PSQL_COPY_RE.search(stmt)
+            if m is None:
+                # e.g. CREATE INDEX must only run once its table is loaded
+                wait_for_copies()
+                conn.execute(stmt)
+                continue
+            table, path, options = m.groups()
+            csv_path = os.path.join(csv_dir, os.path.basename(path))
+            pending.append((table, pool.submit(copy_one, table, csv_path, options)))
+        wait_for_copies()
+
+
+def _parquet_path(data_dir: str, csv_stem: str) -> str:
+    """The Parquet file in ``data_dir`` standing in for a script's CSV path (sans .csv)."""
+    return os.path.join(data_dir, os.path.basename(csv_stem) + ".parquet")
+
+
+def convert_csv_to_parquet(sql_file: str, csv_dir: str):
+    """Write a zstd-compressed Parquet copy of each CSV loaded by ``sql_file``.
+
+    The raw-table script is run against an in-memory DuckDB database (reading
+    the CSVs from ``csv_dir``) and each table is exported next to its CSV, so
+    the Parquet columns carry the schema's types rather than inferred ones.
+    Nothing is done while every Parquet file is newer than its CSV.
+    """
+    import duckdb
+
+    with open(sql_file) as f:
+        sql = f.read()
+    # (table, CSV path in csv_dir, Parquet path) for each COPY in the script
+    copies = [
+        (
+            m.group(2),
+            os.path.join(csv_dir, os.path.basename(m.group(3)) + ".csv"),
+            _parquet_path(csv_dir, m.group(3)),
+        )
+        for m in _DUCKDB_COPY_CSV_RE.finditer(sql)
+    ]
+
+    print("\nConverting CSV files to Parquet...")
+    if all(
+        os.path.exists(parquet_path)
+        and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+        for _, csv_path, parquet_path in copies
+    ):
+        print("  Up to date")
+        return
+    start = time.time()
+
+    conn = duckdb.connect()
+    conn.execute(
+        _DUCKDB_COPY_CSV_RE.sub(
+            lambda m: (
+                f"{m.group(1)}'{os.path.join(csv_dir, os.path.basename(m.group(3)))}"
+                f".csv' {m.group(4)}"
+            ),
+            sql,
+        )
+    )
+    for table, _, parquet_path in copies:
+        conn.execute(f"COPY {table} TO '{parquet_path}' (FORMAT PARQUET, COMPRESSION zstd)")
+    conn.close()
+
+    elapsed = time.time() - start
+    print(f"  Done in {elapsed:.2f}s")
+
+
+def duckdb_connect(config: dict):
+    """Open the DuckDB connection shared by every DuckDB script."""
     import duckdb
 
     db_path = config["duckdb"].get("database", ":memory:")
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    if db_path != ":memory:":
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+    conn = duckdb.connect(db_path)
+    # Let COPY / CREATE TABLE AS run on every core: row order within the
+    # loaded tables is irrelevant to the benchmark queries
+    conn.execute("SET preserve_insertion_order = false")
+    conn.execute(f"SET threads = {os.cpu_count() or 1}")
+    # DuckDB's own progress bar for any statement running over two seconds
+    conn.execute("SET enable_progress_bar = true")
+    conn.execute("SET progress_bar_time = 2000")
+    return conn
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, read in 1 MiB blocks into one reused buffer."""
+    digest = hashlib.sha256()
+    buf = bytearray(1 << 20)
+    with open(path, "rb") as f, memoryview(buf) as view:
+        _advise(f, "POSIX_FADV_SEQUENTIAL")
+        while n := f.readinto(buf):
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def _raw_load_signature(sql_file: str, csv_dir: str, parquet: bool) -> dict:
+    """The load mode plus hashes of the raw-table script and every CSV it loads."""
+    return {
+        "mode": "parquet" if parquet else "csv",
+        "script": file_sha256(sql_file),
+        "csv": {f: file_sha256(os.path.join(csv_dir, f)) for f in EXPECTED_FILES},
+    }
+
+
+def _read_load_state(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_load_state(path: str, state: dict):
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # the state file is only an optimization
+
+
+def _duckdb_tables_exist(conn, sql_file: str) -> bool:
+    """Whether every table the raw-table script loads exists in the database."""
+    with open(sql_file) as f:
+        names = {m.group(2).lower() for m in _DUCKDB_COPY_CSV_RE.finditer(f.read())}
+    found = conn.execute("SELECT lower(table_name) FROM information_schema.tables")
+    return names <= {row[0] for row in found.fetchall()}
 
+
+def run_duckdb_sql_file(
+    conn, sql_file: str, description: str, csv_dir: str = None, parquet: bool = False
+):
+    """Execute a SQL file over a DuckDB connection.
+
+    With ``csv_dir``, the script's CSV COPYs read the file of the same name
+    from that directory, or with ``parquet`` its Parquet copy (see
+    convert_csv_to_parquet).
+    """
     print(f"\n{description}...")
     start = time.time()
 
-    conn = duckdb.connect(db_path)
     with open(sql_file) as f:
         sql = f.read()
+    if csv_dir is not None:
+
+        def redirect(m):
+            if parquet:
+                return f"{m.group(1)}'{_parquet_path(csv_dir, m.group(3))}' (FORMAT PARQUET)"
+            csv_path = os.path.join(csv_dir, os.path.basename(m.group(3)) + ".csv")
+            return f"{m.group(1)}'{csv_path}' {m.group(4)}"
+
+        sql = _DUCKDB_COPY_CSV_RE.sub(redirect, sql)
 
-    # Execute each statement separately (DuckDB requires single-statement execution)
-    for stmt in sql.split(";"):
-        stmt = stmt.strip()
-        if stmt:
-            conn.execute(stmt)
+    # DuckDB runs a multi-statement script in one call
+    conn.execute(sql)
 
     elapsed = time.time() - start
-    conn.close()
     print(f"  Done in {elapsed:.2f}s")
 
 
+def load_duckdb(config: dict, args):
+    """Load the raw tables (and requested extras) into DuckDB."""
+    raw_sql = os.path.join(args.schemas_dir, "duckdb", "raw_tables.sql")
+    db_path = config["duckdb"].get("database", ":memory:")
+    state_path = None if db_path == ":memory:" else db_path + LOAD_STATE_SUFFIX
+
+    # One connection for every script, which also keeps a :memory:
+    # database alive from the raw load through the pre-agg build
+    with duckdb_connect(config) as conn:
+        # Hashing every CSV is only worth it when a match can skip the load;
+        # a forced reload records no state, so the next run hashes afresh
+        signature = None
+        if state_path and not args.force_reload:
+            signature = _raw_load_signature(raw_sql, args.csv_dir, args.to_parquet)
+        if (
+            signature
+            and _read_load_state(state_path) == signature
+            and _duckdb_tables_exist(conn, raw_sql)
+        ):
+            print("\nLoading raw tables into DuckDB...")
+            print("  Skipped: inputs unchanged since the last load (--force-reload)")
+        else:
+            # Forget the old load before touching its tables
+            if state_path:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(state_path)
+            if args.to_parquet:
+                convert_csv_to_parquet(raw_sql, args.csv_dir)
+            run_duckdb_sql_file(
+                conn,
+                raw_sql,
+                "Loading raw tables into DuckDB",
+                csv_dir=args.csv_dir,
+                parquet=args.to_parquet,
+            )
+            if signature:
+                _write_load_state(state_path, signature)
+
+        if args.preagg:
+            preagg_sql = os.path.join(
+                args.schemas_dir, "duckdb", "preagg_tables.sql"
+            )
+            run_duckdb_sql_file(
+                conn, preagg_sql, "Building pre-aggregated tables in DuckDB"
+            )
+
+    if args.tdigest:
+        print("  NOTE: t-digest is not supported in DuckDB; skipping.")
+
+    print(f"\nData loading complete! DuckDB database: {db_path}")
+
+
+def load_postgres(config: dict, args):
+    """Load the raw tables (and requested extras) into Postgres."""
+    if args.to_parquet:
+        print("  NOTE: --to-parquet only applies to DuckDB; loading CSVs.")
+
+    raw_sql = os.path.join(args.schemas_dir, "postgres", "raw_tables.sql")
+    preagg_sql = os.path.join(args.schemas_dir, "postgres", "preagg_tables.sql")
+    tdigest_sql = os.path.join(
+        args.schemas_dir, "postgres", "preagg_sketches_tdigest.sql"
+    )
+
+    if psycopg is None:
+        run_psql(config, raw_sql, "Loading raw tables into Postgres")
+        if args.preagg:
+            run_psql(config, preagg_sql, "Building pre-aggregated tables in Postgres")
+        if args.tdigest:
+            run_psql(
+                config, tdigest_sql, "Building t-digest sketch tables in Postgres"
+            )
+    else:
+        # One server session for every script instead of a psql process each
+        with pg_connect(config) as conn:
+            run_pg_raw_tables(
+                conn,
+                config,
+                raw_sql,
+                args.csv_dir,
+                "Loading raw tables into Postgres",
+                binary=args.binary_copy,
+            )
+            if args.preagg:
+                run_pg_sql(
+                    conn, preagg_sql, "Building pre-aggregated tables in Postgres"
+                )
+            if args.tdigest:
+                run_pg_sql(
+                    conn, tdigest_sql, "Building t-digest sketch tables in Postgres"
+                )
+
+    database = config["postgres"]["database"]
+    print(f"\nData loading complete! Postgres database: {database}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Load benchmark data into database")
     parser.add_argument("--config", default="config.yaml", help="Config file path")
     parser.add_argument(
         "--engine",
-        choices=["duckdb", "postgres"],
+        choices=["duckdb", "postgres", "all"],
         default=None,
-        help="Database engine (default: from config, or duckdb)",
+        help="Database engine, or all to load both at once "
+        "(default: from config, or duckdb)",
     )
     parser.add_argument(
         "--csv-dir",
@@ -107,59 +668,60 @@ def main():
         action="store_true",
         help="Also build t-digest sketch tables (requires pg_tdigest extension)",
     )
+    parser.add_argument(
+        "--to-parquet",
+        action="store_true",
+        help="DuckDB: convert the CSVs to Parquet once and load from the Parquet files",
+    )
+    parser.add_argument(
+        "--force-reload",
+        action="store_true",
+        help="DuckDB: reload the raw tables even if the CSVs are unchanged",
+    )
+    parser.add_argument(
+        "--binary-copy",
+        action="store_true",
+        help="Postgres: convert CSVs client-side and COPY in binary format "
+        "(moves parsing off a CPU-bound server; requires psycopg)",
+    )
     args = parser.parse_args()
 
     config = load_config(args.config)
     engine = args.engine or config.get("engine", "duckdb")
 
-    # Check CSV files exist
-    expected_files = [
-        "exposures.csv",
-        "orders.csv",
-        "events.csv",
-        "pages.csv",
-        "sessions.csv",
-    ]
-    for f in expected_files:
-        path = os.path.join(args.csv_dir, f)
-        if not os.path.exists(path):
-            print(f"ERROR: Missing CSV file: {path}")
-            print("Run 'python -m data.generate_data' first.")
-            sys.exit(1)
-
-    if engine == "duckdb":
-        raw_sql = os.path.join(args.schemas_dir, "duckdb", "raw_tables.sql")
-        run_duckdb_sql_file(config, raw_sql, "Loading raw tables into DuckDB")
-
-        if args.preagg:
-            preagg_sql = os.path.join(args.schemas_dir, "duckdb", "preagg_tables.sql")
-            run_duckdb_sql_file(
-                config, preagg_sql, "Building pre-aggregated tables in DuckDB"
-            )
-
-        if args.tdigest:
-            print("  NOTE: t-digest is not supported in DuckDB; skipping.")
-
-        db_path = config["duckdb"].get("database", ":memory:")
-        print(f"\nData loading complete! DuckDB database: {db_path}")
+    # Check CSV files exist (one directory listing rather than a stat per file)
+    try:
+        with os.scandir(args.csv_dir) as entries:
+            present = {entry.name for entry in entries}
+    except FileNotFoundError:
+        present = set()
+    missing = [f for f in EXPECTED_FILES if f not in present]
+    if missing:
+        for f in missing:
+            print(f"ERROR: Missing CSV file: {os.path.join(args.csv_dir, f)}")
+        print("Run 'python -m data.generate_data' first.")
+        sys.exit(1)
 
+    if engine == "all":
+        # The engines load into independent backends, so run them side by side
+        loaders = (load_duckdb, load_postgres)
+        with ProcessPoolExecutor(max_workers=len(loaders)) as pool:
+            futures = [pool.submit(loader, config, args) for loader in loaders]
+            failed = False
+            for future in futures:
+                try:
+                    future.result()
+                except SystemExit:  # the loader already reported why
+                    failed = True
+                except Exception as e:
+                    print(f"ERROR: {e}")
+                    failed = True
+        if failed:
+            sys.exit(1)
+    elif engine == "duckdb":
+        load_duckdb(config, args)
     elif engine == "postgres":
-        raw_sql = os.path.join(args.schemas_dir, "postgres", "raw_tables.sql")
-        run_psql(config, raw_sql, "Loading raw tables into Postgres")
-
-        if args.preagg:
-            preagg_sql = os.path.join(args.schemas_dir, "postgres", "preagg_tables.sql")
-            run_psql(config, preagg_sql, "Building pre-aggregated tables in Postgres")
-
-        if args.tdigest:
-            tdigest_sql = os.path.join(
-                args.schemas_dir, "postgres", "preagg_sketches_tdigest.sql"
-            )
-            run_psql(
-                config, tdigest_sql, "Building t-digest sketch tables in Postgres"
-            )
-
-        print("\nData loading complete!")
+        load_postgres(config, args)
 
 
 if __name__ == "__main__":
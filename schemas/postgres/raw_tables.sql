@@ -1,8 +1,10 @@
 -- Raw tables for experimentation benchmark
 -- These are the event-level tables that both approaches read from.
+-- They are UNLOGGED: the data can always be reloaded from the CSVs, so the
+-- load skips writing it all to WAL (a crash empties the tables instead).
 
 DROP TABLE IF EXISTS viewed_experiment CASCADE;
-CREATE TABLE viewed_experiment (
+CREATE UNLOGGED TABLE viewed_experiment (
   user_id       VARCHAR(16),
   anonymous_id  VARCHAR(32),
   session_id    VARCHAR(32),
@@ -14,7 +16,7 @@ CREATE TABLE viewed_experiment (
 );
 
 DROP TABLE IF EXISTS orders CASCADE;
-CREATE TABLE orders (
+CREATE UNLOGGED TABLE orders (
   user_id       VARCHAR(16),
   anonymous_id  VARCHAR(32),
   session_id    VARCHAR(32),
@@ -26,7 +28,7 @@ CREATE TABLE orders (
 );
 
 DROP TABLE IF EXISTS events CASCADE;
-CREATE TABLE events (
+CREATE UNLOGGED TABLE events (
   user_id       VARCHAR(16),
   anonymous_id  VARCHAR(32),
   session_id    VARCHAR(32),
@@ -38,7 +40,7 @@ CREATE TABLE events (
 );
 
 DROP TABLE IF EXISTS pages CASCADE;
-CREATE TABLE pages (
+CREATE UNLOGGED TABLE pages (
   user_id       VARCHAR(16),
   anonymous_id  VARCHAR(32),
   session_id    VARCHAR(32),
@@ -49,7 +51,7 @@ CREATE TABLE pages (
 );
 
 DROP TABLE IF EXISTS sessions CASCADE;
-CREATE TABLE sessions (
+CREATE UNLOGGED TABLE sessions (
   user_id       VARCHAR(16),
   anonymous_id  VARCHAR(32),
   session_id    VARCHAR(32),
@@ -69,6 +71,7 @@ CREATE TABLE sessions (
 \copy sessions FROM '/tmp/experimentation-benchmark/csv/sessions.csv' WITH DELIMITER ',' CSV HEADER NULL AS '';
 
 -- Indexes for on-demand approach (simulate realistic indexing)
+SET maintenance_work_mem = '1GB';
 CREATE INDEX idx_exposure_expid ON viewed_experiment (experiment_id, timestamp);
 CREATE INDEX idx_orders_user ON orders (user_id, timestamp);
 CREATE INDEX idx_events_user ON events (user_id, timestamp);